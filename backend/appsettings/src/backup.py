@@ -11,7 +11,7 @@ import zipfile
 from datetime import datetime
 
 from common.src.env_settings import EnvironmentSettings
-from common.src.es_connect import ElasticWrap, IndexPaginate
+from common.src.es_connect import BulkWriter, ElasticWrap, IndexPaginate
 from common.src.helper import get_mapping, ignore_filelist
 from task.models import CustomPeriodicTask
 
@@ -60,13 +60,14 @@ class ElasticBackup:
             "callback": BackupCallback,
             "task": self.task,
             "total": self._get_total(index_name),
+            "slices": EnvironmentSettings.ES_SLICES,
         }
 
         if index_name in self.INDEX_SPLIT:
             paginate_kwargs.update({"size": 200})
 
         paginate = IndexPaginate(f"ta_{index_name}", **paginate_kwargs)
-        _ = paginate.get_results()
+        paginate.run()
 
     @staticmethod
     def _get_total(index_name):
@@ -100,12 +101,11 @@ class ElasticBackup:
         """send bulk to es"""
         file_path = os.path.join(self.CACHE_DIR, file_name)
         with open(file_path, "r", encoding="utf-8") as f:
-            data = f.read()
+            with BulkWriter() as bulk:
+                bulk.add_ndjson_lines(f)
 
-        if not data.strip():
-            return
-
-        _, _ = ElasticWrap("_bulk").post(data=data, ndjson=True)
+        if bulk.failed:
+            print(f"{file_name}: failed to restore {len(bulk.failed)} items")
 
     def get_all_backup_files(self):
         """build all available backup files for view"""
@@ -243,31 +243,22 @@ class BackupCallback:
 
     def run(self):
         """run the junk task"""
-        file_content = self._build_bulk()
-        self._write_es_json(file_content)
+        self._write_es_json()
 
     def _build_bulk(self):
-        """build bulk query data from all_results"""
-        bulk_list = []
-
+        """yield bulk lines document by document"""
         for document in self.source:
             document_id = document["_id"]
             es_index = document["_index"]
             action = {"index": {"_index": es_index, "_id": document_id}}
             source = document["_source"]
-            bulk_list.append(json.dumps(action))
-            bulk_list.append(json.dumps(source))
-
-        # add last newline
-        bulk_list.append("\n")
-        file_content = "\n".join(bulk_list)
-
-        return file_content
+            yield json.dumps(action) + "\n"
+            yield json.dumps(source) + "\n"
 
-    def _write_es_json(self, file_content):
+    def _write_es_json(self):
         """write nd-json file for es _bulk API to disk"""
         index = self.index_name.lstrip("ta_")
         file_name = f"es_{index}-{self.timestamp}-{self.counter}.json"
         file_path = os.path.join(self.cache_dir, "backup", file_name)
         with open(file_path, "a+", encoding="utf-8") as f:
-            f.write(file_content)
+            f.writelines(self._build_bulk())
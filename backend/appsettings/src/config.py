@@ -2,12 +2,17 @@
 Functionality:
 - read and write config
 - load config variables into redis
+- process local config cache, invalidated through redis
 """
 
+import os
+from copy import deepcopy
 from random import randint
-from time import sleep
-from typing import Literal, TypedDict
+from threading import Lock, Thread
+from time import monotonic, sleep
+from typing import Callable, Literal, TypedDict
 
+import redis
 import requests
 from appsettings.src.snapshot import ElasticSnapshot
 from common.src.es_connect import ElasticWrap
@@ -22,6 +27,7 @@ class SubscriptionsConfigType(TypedDict):
     live_channel_size: int
     shorts_channel_size: int
     auto_start: bool
+    scan_workers: int | None
 
 
 class DownloadsConfigType(TypedDict):
@@ -29,6 +35,10 @@ class DownloadsConfigType(TypedDict):
 
     limit_speed: int | None
     sleep_interval: int | None
+    parallel_downloads: int | None
+    parallel_per_channel: int | None
+    fast_add: bool
+    extract_workers: int | None
     autodelete_days: int | None
     format: str | None
     format_sort: str | None
@@ -72,10 +82,15 @@ class AppConfig:
             "live_channel_size": 50,
             "shorts_channel_size": 50,
             "auto_start": False,
+            "scan_workers": None,
         },
         "downloads": {
             "limit_speed": None,
             "sleep_interval": 10,
+            "parallel_downloads": None,
+            "parallel_per_channel": None,
+            "fast_add": False,
+            "extract_workers": None,
             "autodelete_days": None,
             "format": None,
             "format_sort": None,
@@ -100,6 +115,10 @@ class AppConfig:
         self.config = self.get_config()
 
     def get_config(self) -> AppConfigType:
+        """get config from process cache, read from ES on miss"""
+        return AppConfigCache.get(self._read_config)
+
+    def _read_config(self) -> AppConfigType:
         """get config from ES"""
         response, status_code = ElasticWrap(self.ES_PATH).get()
         if not status_code == 200:
@@ -118,6 +137,8 @@ class AppConfig:
         if not status_code == 200:
             print(response)
 
+        AppConfigCache.invalidate()
+
         return self.config
 
     def _update_config_dict(self, to_update) -> None:
@@ -127,6 +148,8 @@ class AppConfig:
         if not status_code == 200:
             print(f"update failed: {response}, {status_code}")
 
+        AppConfigCache.invalidate()
+
     def _validate_key(self, key_map: list[str]) -> None:
         """raise valueerror on invalid key"""
         exists = key_map[1] in self.CONFIG_DEFAULTS.get(key_map[0], {})  # type: ignore  # noqa: E501
@@ -155,7 +178,10 @@ class AppConfig:
 
     def sync_defaults(self):
         """sync defaults at startup, needs to be called with __new__"""
-        return ElasticWrap(self.ES_PATH).post(self.CONFIG_DEFAULTS)
+        response = ElasticWrap(self.ES_PATH).post(self.CONFIG_DEFAULTS)
+        AppConfigCache.invalidate()
+
+        return response
 
     def add_new_defaults(self) -> list[str]:
         """add new default config values to ES, called at startup"""
@@ -177,6 +203,154 @@ class AppConfig:
         return updated
 
 
+class AppConfigCache:
+    """
+    process local cache of the app config
+    - version counter in redis, bumped on every config change
+    - invalidation published on redis channel, one listener thread per process
+    - compare version counter while the listener is not subscribed
+    - count avoided ES reads in redis hash STATS_KEY
+    """
+
+    VERSION_KEY = "config:version"
+    CHANNEL = "config:invalidate"
+    STATS_KEY = "config:stats"
+    STATS_FLUSH = 100
+    LISTENER_RETRY = 30
+
+    _lock = Lock()
+    _config: AppConfigType | None = None
+    _version: str | None = None
+    _generation: int = 0
+    _listener: Thread | None = None
+    _subscribed: bool = False
+    _listener_started: float | None = None
+    _avoided: int = 0
+
+    @classmethod
+    def get(cls, loader: Callable[[], AppConfigType]) -> AppConfigType:
+        """return copy of cached config, call loader on miss"""
+        with cls._lock:
+            cls._start_listener()
+            generation = cls._generation
+            cached = None
+            if cls._config is not None and cls._is_current():
+                cls._avoided += 1
+                cached = deepcopy(cls._config)
+
+            to_flush = cls._pop_avoided(cls.STATS_FLUSH if cached else 0)
+
+        if cached is not None:
+            cls._flush_stats(avoided=to_flush)
+            return cached
+
+        version = RedisArchivist().get_message_str(cls.VERSION_KEY)
+        config = loader()
+        with cls._lock:
+            if generation == cls._generation:
+                cls._config = deepcopy(config)
+                cls._version = version
+
+        cls._flush_stats(avoided=to_flush, es_reads=1)
+        return config
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """bump version and notify all processes to reload"""
+        cls.clear()
+        RedisArchivist().incr(cls.VERSION_KEY)
+        RedisArchivist().publish(cls.CHANNEL, "invalidate")
+
+    @classmethod
+    def clear(cls) -> None:
+        """clear local cache"""
+        with cls._lock:
+            cls._config = None
+            cls._generation += 1
+
+    @classmethod
+    def get_stats(cls) -> dict[str, int]:
+        """get avoided and executed ES config reads of all processes"""
+        stats = RedisArchivist().hgetall(cls.STATS_KEY)
+        return {key: int(value) for key, value in stats.items()}
+
+    @classmethod
+    def _is_current(cls) -> bool:
+        """trust listener if subscribed, else compare version counter"""
+        if cls._subscribed:
+            return True
+
+        version = RedisArchivist().get_message_str(cls.VERSION_KEY)
+        return version == cls._version
+
+    @classmethod
+    def _pop_avoided(cls, threshold: int = 0) -> int:
+        """return and reset avoided counter once above threshold"""
+        if cls._avoided < threshold:
+            return 0
+
+        avoided, cls._avoided = cls._avoided, 0
+        return avoided
+
+    @classmethod
+    def _flush_stats(cls, avoided: int = 0, es_reads: int = 0) -> None:
+        """write counters to redis"""
+        if avoided:
+            RedisArchivist().hincrby(cls.STATS_KEY, "avoided", avoided)
+
+        if es_reads:
+            RedisArchivist().hincrby(cls.STATS_KEY, "es_reads", es_reads)
+
+    @classmethod
+    def _start_listener(cls) -> None:
+        """start listener thread if not running, call with lock"""
+        if cls._listener and cls._listener.is_alive():
+            return
+
+        now = monotonic()
+        last_start = cls._listener_started
+        if last_start is not None and now - last_start < cls.LISTENER_RETRY:
+            return
+
+        cls._listener_started = now
+        cls._subscribed = False
+        cls._listener = Thread(target=cls._listen, daemon=True)
+        cls._listener.start()
+
+    @classmethod
+    def _listen(cls) -> None:
+        """clear cache on every invalidation message"""
+        try:
+            pubsub = RedisArchivist().subscribe(cls.CHANNEL)
+            with cls._lock:
+                # drop anything loaded before subscription was active
+                cls._config = None
+                cls._generation += 1
+                cls._subscribed = True
+
+            for _ in pubsub.listen():
+                cls.clear()
+
+        except redis.exceptions.ConnectionError as err:
+            print(f"[config] cache listener lost connection: {err}")
+        finally:
+            with cls._lock:
+                cls._subscribed = False
+
+    @classmethod
+    def after_fork(cls) -> None:
+        """reset state in forked child, threads don't survive fork"""
+        cls._lock = Lock()
+        cls._config = None
+        cls._listener = None
+        cls._subscribed = False
+        cls._listener_started = None
+        cls._avoided = 0
+
+
+os.register_at_fork(after_in_child=AppConfigCache.after_fork)
+
+
 class ReleaseVersion:
     """compare local version with remote version"""
 
@@ -5,6 +5,7 @@ Functionality:
 
 import os
 
+from channel.src.index import ChannelRunCache
 from common.src.env_settings import EnvironmentSettings
 from common.src.es_connect import ElasticWrap, IndexPaginate
 from common.src.helper import ignore_filelist
@@ -49,7 +50,7 @@ class Scanner:
             self.task.send_progress(["Get all videos indexed."])
 
         data = {"query": {"match_all": {}}, "_source": ["youtube_id"]}
-        response = IndexPaginate("ta_video", data).get_results()
+        response = IndexPaginate("ta_video", data).iter_results()
         return {i["youtube_id"] for i in response}
 
     def apply(self) -> None:
@@ -79,6 +80,7 @@ class Scanner:
             return
 
         total = len(self.to_index)
+        channel_cache = ChannelRunCache()
         for idx, youtube_id in enumerate(self.to_index):
             if self.task:
                 self.task.send_progress(
@@ -87,7 +89,7 @@ class Scanner:
                     ],
                     progress=(idx + 1) / total,
                 )
-            index_new_video(youtube_id)
+            index_new_video(youtube_id, channel_cache=channel_cache)
 
         comment_list = CommentList(task=self.task)
         comment_list.add(video_ids=list(self.to_index))
@@ -12,8 +12,10 @@ import shutil
 import subprocess
 
 from appsettings.src.config import AppConfig
+from channel.src.index import ChannelRunCache
 from common.src.env_settings import EnvironmentSettings
 from common.src.helper import ignore_filelist
+from common.src.known_ids import KnownIds
 from download.src.thumbnails import ThumbManager
 from PIL import Image
 from video.src.comments import CommentList
@@ -129,6 +131,7 @@ class ImportFolderScanner:
     def process_videos(self):
         """loop through all videos"""
         config = AppConfig().config
+        channel_cache = ChannelRunCache()
         for idx, current_video in enumerate(self.to_import):
             if not current_video["media"]:
                 print(f"{current_video}: no matching media file found.")
@@ -144,7 +147,7 @@ class ImportFolderScanner:
             self._convert_video(current_video)
             print(f"manual import: {current_video}")
 
-            ManualImport(current_video, config).run()
+            ManualImport(current_video, config, channel_cache).run()
 
         video_ids = [i["video_id"] for i in self.to_import]
         comment_list = CommentList(task=self.task)
@@ -388,9 +391,10 @@ class ImportFolderScanner:
 class ManualImport:
     """import single identified video"""
 
-    def __init__(self, current_video, config):
+    def __init__(self, current_video, config, channel_cache=None):
         self.current_video = current_video
         self.config = config
+        self.channel_cache = channel_cache
 
     def run(self):
         """run all"""
@@ -402,6 +406,7 @@ class ManualImport:
         """get metadata from yt or json"""
         video_id = self.current_video["video_id"]
         video = YoutubeVideo(video_id)
+        video.channel_cache = self.channel_cache
         video.build_json(
             youtube_meta_overwrite=self._get_info_json(),
             media_path=self.current_video["media"],
@@ -415,6 +420,7 @@ class ManualImport:
 
         video.check_subtitles(subtitle_files=self.current_video["subtitle"])
         video.upload_to_es()
+        KnownIds().add(video_id)
 
         if video.offline_import and self.current_video["thumb"]:
             old_path = self.current_video["thumb"]
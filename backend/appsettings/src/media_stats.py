@@ -0,0 +1,96 @@
+"""
+Functionality:
+- refresh duration, streams and size of all videos from media files
+- only probe files changed since the last probe
+"""
+
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from common.src.env_settings import EnvironmentSettings
+from common.src.es_connect import BulkWriter, IndexPaginate
+from video.src.media_streams import MediaStreamExtractor
+
+
+class MediaStatsRefresh:
+    """probe changed media files in parallel, update index in bulk"""
+
+    VIDEOS: str = EnvironmentSettings.MEDIA_DIR
+
+    def __init__(self, task=False) -> None:
+        self.task = task
+        # ffprobe runs as subprocess, threads keep all cores busy
+        self.workers = os.cpu_count() or 1
+
+    def run(self) -> int:
+        """refresh changed, returns number of videos updated"""
+        to_probe = self._get_changed()
+        total = len(to_probe)
+        print(f"media stats: {total} videos changed since last probe")
+        updated = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(self._probe, media_url): youtube_id
+                for youtube_id, media_url in to_probe
+            }
+            with BulkWriter() as bulk:
+                for idx, future in enumerate(as_completed(futures)):
+                    self._notify(idx, total)
+                    media_stats = future.result()
+                    if not media_stats:
+                        continue
+
+                    body = {"doc": media_stats}
+                    bulk.update("ta_video", futures[future], body)
+                    updated += 1
+
+        return updated
+
+    def _get_changed(self) -> list[tuple[str, str]]:
+        """get youtube_id, media_url of videos with outdated probe key"""
+        if self.task:
+            self.task.send_progress(["Compare media files with index."])
+
+        data = {
+            "query": {"match_all": {}},
+            "_source": ["youtube_id", "media_url", "media_probe_key"],
+        }
+        to_probe = []
+        for video in IndexPaginate("ta_video", data).iter_results():
+            media_url = video.get("media_url")
+            if not media_url:
+                continue
+
+            media_path = os.path.join(self.VIDEOS, media_url)
+            try:
+                probe_key = MediaStreamExtractor(media_path).get_probe_key(
+                    media_url
+                )
+            except FileNotFoundError:
+                # missing files are handled by filesystem rescan
+                continue
+
+            if probe_key != video.get("media_probe_key"):
+                to_probe.append((video["youtube_id"], media_url))
+
+        return to_probe
+
+    def _probe(self, media_url: str) -> dict | None:
+        """probe single file, in worker thread"""
+        media_path = os.path.join(self.VIDEOS, media_url)
+        try:
+            return MediaStreamExtractor(media_path).get_media_stats(media_url)
+        except (subprocess.CalledProcessError, FileNotFoundError) as err:
+            print(f"{media_url}: failed to probe media file: {err}")
+            return None
+
+    def _notify(self, idx: int, total: int) -> None:
+        """send progress to task"""
+        if not self.task:
+            return
+
+        self.task.send_progress(
+            message_lines=[f"Refresh media stats {idx + 1}/{total}"],
+            progress=(idx + 1) / total,
+        )
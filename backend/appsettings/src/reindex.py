@@ -4,7 +4,6 @@ functionality:
 - index and update in es
 """
 
-import json
 import os
 from datetime import datetime
 from typing import Callable, TypedDict
@@ -12,7 +11,7 @@ from typing import Callable, TypedDict
 from appsettings.src.config import AppConfig
 from channel.src.index import YoutubeChannel
 from common.src.env_settings import EnvironmentSettings
-from common.src.es_connect import ElasticWrap, IndexPaginate
+from common.src.es_connect import BulkWriter, ElasticWrap, IndexPaginate
 from common.src.helper import rand_sleep
 from common.src.ta_redis import RedisQueue
 from download.src.subscriptions import ChannelSubscription
@@ -126,13 +125,10 @@ class ReindexPopulate(ReindexBase):
         """get total hits from index"""
         index_name = reindex_config["index_name"]
         active_key = reindex_config["active_key"]
-        data = {
-            "query": {"term": {active_key: {"value": True}}},
-            "_source": False,
-        }
-        total = IndexPaginate(index_name, data, keep_source=True).get_results()
+        data = {"query": {"term": {active_key: {"value": True}}}}
+        response, _ = ElasticWrap(f"{index_name}/_count").get(data=data)
 
-        return len(total)
+        return response.get("count", 0)
 
     def _get_daily_should(self, total_hits: int) -> int:
         """calc how many should reindex daily"""
@@ -238,7 +234,7 @@ class ReindexManual(ReindexBase):
             "query": {"term": {"channel.channel_id": {"value": channel_id}}},
             "_source": ["youtube_id"],
         }
-        all_results = IndexPaginate("ta_video", data).get_results()
+        all_results = IndexPaginate("ta_video", data).iter_results()
         return [i["youtube_id"] for i in all_results]
 
     def _get_playlist_videos(self, playlist_id: str) -> list[str]:
@@ -247,7 +243,7 @@ class ReindexManual(ReindexBase):
             "query": {"term": {"playlist.keyword": {"value": playlist_id}}},
             "_source": ["youtube_id"],
         }
-        all_results = IndexPaginate("ta_video", data).get_results()
+        all_results = IndexPaginate("ta_video", data).iter_results()
         return [i["youtube_id"] for i in all_results]
 
 
@@ -322,7 +318,7 @@ class Reindex(ReindexBase):
         media_url = os.path.join(
             EnvironmentSettings.MEDIA_DIR, es_meta["media_url"]
         )
-        video.build_json(media_path=media_url)
+        video.build_json(media_path=media_url, cached=es_meta)
         if not video.youtube_meta:
             video.deactivate()
             return
@@ -373,6 +369,9 @@ class Reindex(ReindexBase):
         if overwrites:
             channel.json_data["channel_overwrites"] = overwrites
 
+        if cursor := es_meta.get("channel_scan_cursor"):
+            channel.json_data["channel_scan_cursor"] = cursor
+
         channel.upload_to_es()
         channel.sync_to_videos()
         ChannelFullScan(channel_id).scan()
@@ -548,15 +547,7 @@ class ChannelFullScan:
             return
 
         print(f"{self.channel_id}: fixing {len(self.to_update)} videos")
-        bulk_list = []
-        for video in self.to_update:
-            action = {
-                "update": {"_id": video.get("video_id"), "_index": "ta_video"}
-            }
-            source = {"doc": {"vid_type": video.get("vid_type")}}
-            bulk_list.append(json.dumps(action))
-            bulk_list.append(json.dumps(source))
-        # add last newline
-        bulk_list.append("\n")
-        data = "\n".join(bulk_list)
-        _, _ = ElasticWrap("_bulk").post(data=data, ndjson=True)
+        with BulkWriter() as bulk:
+            for video in self.to_update:
+                source = {"doc": {"vid_type": video.get("vid_type")}}
+                bulk.update("ta_video", video.get("video_id"), source)
@@ -1,7 +1,7 @@
 """all app settings API views"""
 
 from appsettings.src.backup import ElasticBackup
-from appsettings.src.config import AppConfig
+from appsettings.src.config import AppConfig, AppConfigCache
 from appsettings.src.snapshot import ElasticSnapshot
 from common.src.ta_redis import RedisArchivist
 from common.views_base import AdminOnly, ApiBaseView
@@ -10,7 +10,7 @@ from download.src.yt_dlp_base import CookieHandler, POTokenHandler
 from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
 from task.src.task_manager import TaskCommand
-from task.tasks import run_restore_backup
+from task.tasks import rebuild_known_ids, run_restore_backup
 
 
 class AppConfigApiView(ApiBaseView):
@@ -97,6 +97,8 @@ class SnapshotApiView(ApiBaseView):
             message = {"message": "failed to restore snapshot"}
             return Response(message, status=400)
 
+        AppConfigCache.invalidate()
+        rebuild_known_ids.delay()
         return Response(response)
 
     @staticmethod
@@ -7,6 +7,7 @@ functionality:
 import json
 import os
 from datetime import datetime
+from threading import Lock
 
 from common.src.env_settings import EnvironmentSettings
 from common.src.es_connect import ElasticWrap, IndexPaginate
@@ -26,6 +27,8 @@ class YoutubeChannel(YouTubeItem):
         "playlist_items": "1,0",
         "skip_download": True,
     }
+    # only stored in channel index, not synced to videos
+    CHANNEL_ONLY: tuple[str, ...] = ("channel_scan_cursor",)
 
     def __init__(self, youtube_id, task=False):
         super().__init__(youtube_id)
@@ -156,6 +159,9 @@ class YoutubeChannel(YouTubeItem):
         # add ingest pipeline
         processors = []
         for field, value in self.json_data.items():
+            if field in self.CHANNEL_ONLY:
+                continue
+
             line = {"set": {"field": "channel." + field, "value": value}}
             processors.append(line)
         data = {"description": self.youtube_id, "processors": processors}
@@ -344,3 +350,28 @@ def channel_overwrites(channel_id, overwrites):
     channel.sync_to_videos()
 
     return channel.json_data
+
+
+class ChannelRunCache:
+    """
+    channel json_data memoized for a single indexing run
+    each channel is built at most once, also across parallel slots
+    """
+
+    def __init__(self):
+        self._channels: dict[str, dict] = {}
+        self._locks: dict[str, Lock] = {}
+        self._lock = Lock()
+
+    def get(self, channel_id: str, fallback: dict | bool = False) -> dict:
+        """get channel json_data, build and upload new channel once"""
+        with self._lock:
+            channel_lock = self._locks.setdefault(channel_id, Lock())
+
+        with channel_lock:
+            if channel_id not in self._channels:
+                channel = YoutubeChannel(channel_id)
+                channel.build_json(upload=True, fallback=fallback)
+                self._channels[channel_id] = channel.json_data
+
+            return self._channels[channel_id]
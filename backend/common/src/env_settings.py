@@ -35,10 +35,18 @@ class EnvironmentSettings:
     MEDIA_DIR: str = str(environ.get("TA_MEDIA_DIR", "/youtube"))
     APP_DIR: str = str(environ.get("TA_APP_DIR", "/app"))
     CACHE_DIR: str = str(environ.get("TA_CACHE_DIR", "/cache"))
+    DL_CACHE_MAX_AGE: int = int(environ.get("TA_DL_CACHE_MAX_AGE", 24))
+    MOVE_VERIFY: str = str(environ.get("TA_MOVE_VERIFY", "size"))
+    # 0 or less disables coalescing of task progress
+    TASK_PROGRESS_RATE: float = max(
+        float(environ.get("TA_PROGRESS_RATE", 2)), 0
+    )
+    EXTRACT_CACHE_SIZE: int = int(environ.get("TA_EXTRACT_CACHE_SIZE", 0))
 
     # Redis
     REDIS_CON: str = str(environ.get("REDIS_CON"))
     REDIS_NAME_SPACE: str = str(environ.get("REDIS_NAME_SPACE", "ta:"))
+    REDIS_MAX_CON: int = int(environ.get("REDIS_MAX_CON", 50))
 
     # ElasticSearch
     ES_URL: str = str(environ.get("ES_URL"))
@@ -50,6 +58,8 @@ class EnvironmentSettings:
         )
     )
     ES_DISABLE_VERIFY_SSL: bool = bool(environ.get("ES_DISABLE_VERIFY_SSL"))
+    ES_SLICES: int = int(environ.get("ES_SLICES", 1))
+    ES_POOL_SIZE: int = int(environ.get("ES_POOL_SIZE", 10))
 
     def get_cache_root(self):
         """get root for web server"""
@@ -93,7 +103,8 @@ class EnvironmentSettings:
         print(
             f"""
             REDIS_CON: {self.REDIS_CON}
-            REDIS_NAME_SPACE: {self.REDIS_NAME_SPACE}"""
+            REDIS_NAME_SPACE: {self.REDIS_NAME_SPACE}
+            REDIS_MAX_CON: {self.REDIS_MAX_CON}"""
         )
 
     def print_es_paths(self):
@@ -104,7 +115,9 @@ class EnvironmentSettings:
             ES_PASS: *****
             ES_USER: {self.ES_USER}
             ES_SNAPSHOT_DIR: {self.ES_SNAPSHOT_DIR}
-            ES_DISABLE_VERIFY_SSL: {self.ES_DISABLE_VERIFY_SSL}"""
+            ES_DISABLE_VERIFY_SSL: {self.ES_DISABLE_VERIFY_SSL}
+            ES_SLICES: {self.ES_SLICES}
+            ES_POOL_SIZE: {self.ES_POOL_SIZE}"""
         )
 
     def print_all(self):
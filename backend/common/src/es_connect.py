@@ -1,17 +1,81 @@
 """
 functionality:
 - wrapper around requests to call elastic search
+- pooled keep-alive session per process
+- batched bulk writer with retry on rejections
 - reusable search_after to extract total index
 """
 
 # pylint: disable=missing-timeout
 
 import json
+import os
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from copy import deepcopy
+from threading import Lock
+from time import sleep
 from typing import Any
 
 import requests
 import urllib3
 from common.src.env_settings import EnvironmentSettings
+from requests.adapters import HTTPAdapter
+
+
+class ElasticSession:
+    """
+    hold one pooled requests session per process
+    rebuilt after fork, sockets can't be shared with the parent
+    """
+
+    _session: requests.Session | None = None
+    _pid: int | None = None
+    _lock = Lock()
+
+    @classmethod
+    def get(cls) -> requests.Session:
+        """get session for current process"""
+        pid = os.getpid()
+        if cls._session is None or cls._pid != pid:
+            with cls._lock:
+                if cls._session is None or cls._pid != pid:
+                    cls._session = cls._build()
+                    cls._pid = pid
+
+        return cls._session
+
+    @staticmethod
+    def _build() -> requests.Session:
+        """build new session with connection pool"""
+        pool_size = EnvironmentSettings.ES_POOL_SIZE
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        return session
+
+    @classmethod
+    def get_stats(cls) -> dict[str, int]:
+        """connection reuse stats of current process"""
+        stats = {"requests": 0, "connections": 0, "reused": 0}
+        if cls._session is None or cls._pid != os.getpid():
+            return stats
+
+        for adapter in set(cls._session.adapters.values()):
+            if not isinstance(adapter, HTTPAdapter):
+                continue
+
+            for pool_key in adapter.poolmanager.pools.keys():
+                pool = adapter.poolmanager.pools.get(pool_key)
+                if not pool:
+                    continue
+
+                stats["requests"] += pool.num_requests
+                stats["connections"] += pool.num_connections
+
+        stats["reused"] = stats["requests"] - stats["connections"]
+        return stats
 
 
 class ElasticWrap:
@@ -48,7 +112,7 @@ class ElasticWrap:
         if data:
             kwargs["json"] = data
 
-        response = requests.get(self.url, **kwargs)
+        response = ElasticSession.get().get(self.url, **kwargs)
 
         if print_error and not response.ok:
             print(response.text)
@@ -80,7 +144,7 @@ class ElasticWrap:
         if EnvironmentSettings.ES_DISABLE_VERIFY_SSL:
             kwargs["verify"] = False
 
-        response = requests.post(self.url, **kwargs)
+        response = ElasticSession.get().post(self.url, **kwargs)
 
         if not response.ok:
             print(response.text)
@@ -105,7 +169,7 @@ class ElasticWrap:
         if EnvironmentSettings.ES_DISABLE_VERIFY_SSL:
             kwargs["verify"] = False
 
-        response = requests.put(self.url, **kwargs)
+        response = ElasticSession.get().put(self.url, **kwargs)
 
         if not response.ok:
             print(response.text)
@@ -132,7 +196,7 @@ class ElasticWrap:
         if EnvironmentSettings.ES_DISABLE_VERIFY_SSL:
             kwargs["verify"] = False
 
-        response = requests.delete(self.url, **kwargs)
+        response = ElasticSession.get().delete(self.url, **kwargs)
 
         if not response.ok:
             print(response.text)
@@ -140,6 +204,141 @@ class ElasticWrap:
         return response.json(), response.status_code
 
 
+class BulkWriter:
+    """buffer actions for the _bulk API and send in batches
+    - flush when max_docs or max_bytes is reached
+    - retry items rejected with 429 with exponential backoff
+    - collect failed items in self.failed, ignore_status to skip expected
+    use as context manager to flush remaining items on exit
+    """
+
+    MAX_DOCS = 500
+    MAX_BYTES = 5 * 1024 * 1024
+    MAX_RETRIES = 5
+    BACKOFF = 1
+    RETRY_STATUS = 429
+    HAS_SOURCE = ["index", "create", "update"]
+
+    def __init__(
+        self,
+        max_docs: int | None = None,
+        max_bytes: int | None = None,
+        refresh: bool = False,
+        ignore_status: tuple[int, ...] = (),
+    ):
+        self.max_docs = max_docs or self.MAX_DOCS
+        self.max_bytes = max_bytes or self.MAX_BYTES
+        self.path = "_bulk?refresh=true" if refresh else "_bulk"
+        self.ignore_status = ignore_status
+        self.buffer: list[str] = []
+        self.buffer_bytes = 0
+        self.total = 0
+        self.failed: list[dict] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+
+    def index(self, index_name: str, doc_id: str, document: dict) -> None:
+        """add document to index"""
+        action = {"index": {"_index": index_name, "_id": doc_id}}
+        self.add(action, document)
+
+    def update(self, index_name: str, doc_id: str, body: dict) -> None:
+        """add update with doc or script body"""
+        action = {"update": {"_index": index_name, "_id": doc_id}}
+        self.add(action, body)
+
+    def add(self, action: dict, source: dict | None = None) -> None:
+        """add action dict with optional source"""
+        source_line = json.dumps(source) if source is not None else None
+        self.add_raw(json.dumps(action), source_line)
+
+    def add_raw(self, action_line: str, source_line: str | None) -> None:
+        """add already serialized action and source line"""
+        entry = action_line.strip() + "\n"
+        if source_line is not None:
+            entry += source_line.strip() + "\n"
+
+        self.buffer.append(entry)
+        self.buffer_bytes += len(entry)
+        if len(self.buffer) >= self.max_docs:
+            self.flush()
+        elif self.buffer_bytes >= self.max_bytes:
+            self.flush()
+
+    def add_ndjson_lines(self, lines) -> None:
+        """add iterable of ndjson lines, e.g. open file handle"""
+        lines_iter = (i for i in lines if i.strip())
+        for action_line in lines_iter:
+            op_type = next(iter(json.loads(action_line)))
+            source_line = None
+            if op_type in self.HAS_SOURCE:
+                source_line = next(lines_iter)
+
+            self.add_raw(action_line, source_line)
+
+    def flush(self) -> None:
+        """send buffer to es, retry rejected"""
+        to_send = self.buffer
+        self.buffer = []
+        self.buffer_bytes = 0
+        if not to_send:
+            return
+
+        self.total += len(to_send)
+        for attempt in range(self.MAX_RETRIES + 1):
+            to_send = self._send(to_send)
+            if not to_send:
+                return
+
+            if attempt < self.MAX_RETRIES:
+                wait = self.BACKOFF * 2**attempt
+                print(f"[bulk] {len(to_send)} items rejected, retry {wait}s")
+                sleep(wait)
+
+        print(f"[bulk] {len(to_send)} items failed after retries")
+        self.failed.extend(
+            {"status": self.RETRY_STATUS, "entry": i} for i in to_send
+        )
+
+    def _send(self, entries: list[str]) -> list[str]:
+        """send single request, return entries to retry"""
+        response, status_code = ElasticWrap(self.path).post(
+            data="".join(entries), ndjson=True
+        )
+        if status_code == self.RETRY_STATUS:
+            return entries
+
+        if status_code != 200:
+            self.failed.extend(
+                {"status": status_code, "entry": i} for i in entries
+            )
+            return []
+
+        if not response.get("errors"):
+            return []
+
+        to_retry = []
+        for entry, item in zip(entries, response["items"]):
+            result = next(iter(item.values()))
+            status = result.get("status")
+            if status < 300 or status in self.ignore_status:
+                continue
+
+            if status == self.RETRY_STATUS:
+                to_retry.append(entry)
+                continue
+
+            print(f"[bulk] failed {result.get('_id')}: {result.get('error')}")
+            self.failed.append(result)
+
+        return to_retry
+
+
 class IndexPaginate:
     """use search_after to go through whole index
     kwargs:
@@ -148,23 +347,94 @@ class IndexPaginate:
     - callback: obj, Class implementing run method callback for every loop
     - task: task object to send notification
     - total: int, total items in index for progress message
+    - slices: int, split run() in sliced searches processed in parallel
+
+    get_results() collects all results in a list, use iter_results() or
+    iter_pages() to stream through big indexes with memory bound by size
     """
 
     DEFAULT_SIZE = 500
+    NOTIFY_INTERVAL = 1
 
     def __init__(self, index_name, data, **kwargs):
         self.index_name = index_name
         self.data = data
         self.pit_id = False
         self.kwargs = kwargs
+        self.processed = 0
+        self.counter = 0
+        self.lock = Lock()
 
     def get_results(self):
         """get all results, add task and total for notifications"""
+        return list(self.iter_results())
+
+    def iter_results(self):
+        """yield single results lazily"""
+        keep_source = self.kwargs.get("keep_source")
+        for page in self.iter_pages():
+            for hit in page:
+                yield hit if keep_source else hit["_source"]
+
+    def iter_pages(self):
+        """yield list of raw hits per page, clean up pit when done"""
+        self.get_pit()
+        try:
+            self.validate_data()
+            yield from self._page_loop()
+        finally:
+            self.clean_pit()
+
+    def run(self):
+        """go through all pages for callback only, discard results"""
+        slices = self.kwargs.get("slices") or 1
+        if slices <= 1:
+            for _ in self.iter_pages():
+                pass
+
+            return
+
         self.get_pit()
-        self.validate_data()
-        all_results = self.run_loop()
-        self.clean_pit()
-        return all_results
+        try:
+            self.validate_data()
+            with ThreadPoolExecutor(max_workers=slices) as executor:
+                futures = [
+                    executor.submit(self._run_slice, slice_id, slices)
+                    for slice_id in range(slices)
+                ]
+                self._wait_slices(futures)
+        finally:
+            self.clean_pit()
+
+    def _run_slice(self, slice_id, slices):
+        """run sliced search on shared pit"""
+        data = deepcopy(self.data)
+        data["slice"] = {"id": slice_id, "max": slices}
+        for _ in self._page_loop(data, notify=False):
+            pass
+
+    def _wait_slices(self, futures):
+        """wait for slices, task progress only from calling thread"""
+        notified = 0
+        pending = futures
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=self.NOTIFY_INTERVAL,
+                return_when=FIRST_EXCEPTION,
+            )
+            if any(future.exception() for future in done):
+                break
+
+            with self.lock:
+                processed = self.processed
+
+            if self.kwargs.get("task") and processed != notified:
+                self._notify(processed)
+                notified = processed
+
+        for future in futures:
+            future.result()
 
     def get_pit(self):
         """get pit for index"""
@@ -186,37 +456,43 @@ class IndexPaginate:
         self.data["size"] = self.kwargs.get("size") or self.DEFAULT_SIZE
         self.data["pit"] = {"id": self.pit_id, "keep_alive": "10m"}
 
-    def run_loop(self):
-        """loop through results until last hit"""
-        all_results = []
-        counter = 0
+    def _page_loop(self, data=None, notify=True):
+        """loop through pages until last hit"""
+        if data is None:
+            data = self.data
+
         while True:
-            response, _ = ElasticWrap("_search").get(data=self.data)
+            response, _ = ElasticWrap("_search").get(data=data)
             all_hits = response["hits"]["hits"]
             if not all_hits:
                 break
 
-            for hit in all_hits:
-                if self.kwargs.get("keep_source"):
-                    all_results.append(hit)
-                else:
-                    all_results.append(hit["_source"])
+            self._process_page(all_hits, notify=notify)
 
-            if self.kwargs.get("callback"):
-                self.kwargs.get("callback")(
-                    all_hits, self.index_name, counter=counter
-                ).run()
+            # update search_after with last hit data
+            data["search_after"] = all_hits[-1]["sort"]
 
-            if self.kwargs.get("task"):
-                print(f"{self.index_name}: processing page {counter}")
-                self._notify(len(all_results))
+            yield all_hits
 
-            counter += 1
+    def _process_page(self, all_hits, notify=True):
+        """run callback and notify, thread safe for sliced runs"""
+        with self.lock:
+            counter = self.counter
+            self.counter += 1
 
-            # update search_after with last hit data
-            self.data["search_after"] = all_hits[-1]["sort"]
+        if self.kwargs.get("callback"):
+            self.kwargs.get("callback")(
+                all_hits, self.index_name, counter=counter
+            ).run()
 
-        return all_results
+        with self.lock:
+            self.processed += len(all_hits)
+            processed = self.processed
+
+        if self.kwargs.get("task"):
+            print(f"{self.index_name}: processing page {counter}")
+            if notify:
+                self._notify(processed)
 
     def _notify(self, processed):
         """send notification on task"""
@@ -228,4 +504,8 @@ class IndexPaginate:
 
     def clean_pit(self):
         """delete pit from elastic search"""
+        if not self.pit_id:
+            return
+
         ElasticWrap("_pit").delete(data={"id": self.pit_id})
+        self.pit_id = False
@@ -7,7 +7,6 @@ import json
 import os
 import random
 import string
-import subprocess
 from datetime import datetime
 from time import sleep
 from typing import Any
@@ -15,6 +14,7 @@ from urllib.parse import urlparse
 
 import requests
 from common.src.es_connect import IndexPaginate
+from common.src.known_ids import KnownIds
 
 
 def ignore_filelist(filelist: list[str]) -> list[str]:
@@ -127,16 +127,33 @@ def time_parser(timestamp: str) -> float:
     return int(hours) * 60 * 60 + int(minutes) * 60 + float(seconds)
 
 
-def clear_dl_cache(cache_dir: str) -> int:
-    """clear leftover files from dl cache"""
+def clear_dl_cache(cache_dir: str, max_age: int) -> int:
+    """clear orphaned files older than max_age hours from dl cache"""
     print("clear download cache")
     download_cache_dir = os.path.join(cache_dir, "download")
     leftover_files = ignore_filelist(os.listdir(download_cache_dir))
-    for cached in leftover_files:
+    if not leftover_files:
+        return 0
+
+    # keep partial downloads of queued videos to resume
+    file_ids = {i: i.split(".", maxsplit=1)[0] for i in leftover_files}
+    orphaned = set(
+        is_missing(list(set(file_ids.values())), index_name="ta_download")
+    )
+    cutoff = datetime.now().timestamp() - max_age * 60 * 60
+    deleted = 0
+    for cached, youtube_id in file_ids.items():
+        if youtube_id not in orphaned:
+            continue
+
         to_delete = os.path.join(download_cache_dir, cached)
+        if os.path.getmtime(to_delete) > cutoff:
+            continue
+
         os.remove(to_delete)
+        deleted += 1
 
-    return len(leftover_files)
+    return deleted
 
 
 def get_mapping() -> dict:
@@ -147,42 +164,20 @@ def get_mapping() -> dict:
     return index_config
 
 
-def is_shorts(youtube_id: str) -> bool:
+def is_shorts(
+    youtube_id: str, session: requests.Session | None = None
+) -> bool:
     """check if youtube_id is a shorts video, bot not it it's not a shorts"""
     shorts_url = f"https://www.youtube.com/shorts/{youtube_id}"
     cookies = {"SOCS": "CAI"}
-    response = requests.head(
+    requester = session or requests
+    response = requester.head(
         shorts_url, cookies=cookies, headers=requests_headers(), timeout=10
     )
 
     return response.status_code == 200
 
 
-def get_duration_sec(file_path: str) -> int:
-    """get duration of media file from file path"""
-
-    duration = subprocess.run(
-        [
-            "ffprobe",
-            "-v",
-            "error",
-            "-show_entries",
-            "format=duration",
-            "-of",
-            "default=noprint_wrappers=1:nokey=1",
-            file_path,
-        ],
-        capture_output=True,
-        check=True,
-    )
-    duration_raw = duration.stdout.decode().strip()
-    if duration_raw == "N/A":
-        return 0
-
-    duration_sec = int(float(duration_raw))
-    return duration_sec
-
-
 def get_duration_str(seconds: int) -> str:
     """Return a human-readable duration string from seconds."""
     if not seconds:
@@ -252,12 +247,19 @@ def is_missing(
     if isinstance(to_check, str):
         to_check = [to_check]
 
+    if index_name == KnownIds.INDEX_NAME and on_key == "youtube_id":
+        known_ids = KnownIds()
+        candidates = known_ids.filter_known(to_check)
+        if candidates is not None:
+            existing_ids = known_ids.get_existing(candidates)
+            return [i for i in to_check if i not in existing_ids]
+
     data = {
         "query": {"terms": {on_key: to_check}},
         "_source": [on_key],
     }
-    result = IndexPaginate(index_name, data=data).get_results()
-    existing_ids = [i[on_key] for i in result]
+    result = IndexPaginate(index_name, data=data).iter_results()
+    existing_ids = {i[on_key] for i in result}
     dl = [i for i in to_check if i not in existing_ids]
 
     return dl
@@ -28,6 +28,7 @@ class YouTubeItem:
         self.config = AppConfig().config
         self.youtube_meta = False
         self.json_data = False
+        self.use_cache = False
 
     def build_yt_url(self):
         """build youtube url"""
@@ -43,7 +44,10 @@ class YouTubeItem:
             obs_request["extractor_args"] = {"youtube": {"lang": langs_list}}
 
         url = self.build_yt_url()
-        self.youtube_meta = YtWrap(obs_request, self.config).extract(url)
+        cache_kind = self.index_name.removeprefix("ta_")
+        self.youtube_meta = YtWrap(obs_request, self.config).extract(
+            url, cache_kind=cache_kind if self.use_cache else None
+        )
 
     def get_from_es(self):
         """get indexed data from elastic search"""
@@ -0,0 +1,125 @@
+"""
+Functionality:
+- keep a set of known youtube_ids in redis
+- known is indexed in ta_video or in ta_download, pending or ignored
+- fast first pass for duplicate checks, positives get confirmed in es
+"""
+
+from common.src.es_connect import ElasticWrap, IndexPaginate
+from common.src.ta_redis import RedisBase
+
+
+class KnownIds(RedisBase):
+    """set of youtube_ids indexed or in the download queue"""
+
+    INDEX_NAME: str = "ta_video,ta_download"
+    CHUNK_SIZE: int = 1000
+    PLACEHOLDER: str = "_rebuild"
+    RECOVER_TIMEOUT: int = 300
+
+    # add to live set, mirror to rebuild set while a rebuild is running
+    ADD_SCRIPT: str = """
+        redis.call('SADD', KEYS[1], unpack(ARGV))
+        if redis.call('EXISTS', KEYS[2]) == 1 then
+            redis.call('SADD', KEYS[2], unpack(ARGV))
+        end
+        return 1
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.key = f"{self.NAME_SPACE}known:youtube_id"
+        self.rebuild_key = f"{self.key}:rebuild"
+        self.ready_key = f"{self.key}:ready"
+
+    def is_ready(self) -> bool:
+        """check if set has been built"""
+        return bool(self.conn.execute_command("EXISTS", self.ready_key))
+
+    def add(self, youtube_ids: str | list[str]) -> None:
+        """add ids to set"""
+        if isinstance(youtube_ids, str):
+            youtube_ids = [youtube_ids]
+
+        for chunk in self._chunks(youtube_ids):
+            self.conn.execute_command(
+                "EVAL", self.ADD_SCRIPT, 2, self.key, self.rebuild_key, *chunk
+            )
+
+    def discard(self, youtube_ids: str | list[str]) -> None:
+        """remove ids not indexed anywhere anymore"""
+        if isinstance(youtube_ids, str):
+            youtube_ids = [youtube_ids]
+
+        existing = self.get_existing(youtube_ids)
+        to_remove = [i for i in youtube_ids if i not in existing]
+        for chunk in self._chunks(to_remove):
+            self.conn.execute_command("SREM", self.key, *chunk)
+            self.conn.execute_command("SREM", self.rebuild_key, *chunk)
+
+    def filter_known(self, youtube_ids: list[str]) -> list[str] | None:
+        """return ids possibly known, None if set is not built yet"""
+        if not self.is_ready():
+            return None
+
+        known = []
+        for chunk in self._chunks(youtube_ids):
+            flags = self.conn.execute_command("SMISMEMBER", self.key, *chunk)
+            known.extend(i for i, flag in zip(chunk, flags) if flag)
+
+        return known
+
+    def get_existing(self, youtube_ids: list[str]) -> set[str]:
+        """confirm ids in es, returns set of ids found"""
+        if not youtube_ids:
+            return set()
+
+        data = {
+            "query": {"terms": {"youtube_id": youtube_ids}},
+            "_source": ["youtube_id"],
+        }
+        result = IndexPaginate(self.INDEX_NAME, data).iter_results()
+
+        return {i["youtube_id"] for i in result}
+
+    def rebuild(self) -> int:
+        """rebuild set from es, returns total ids"""
+        print("known ids: rebuild from index")
+        self._wait_for_index()
+        self.conn.execute_command("DEL", self.rebuild_key)
+        self.conn.execute_command("SADD", self.rebuild_key, self.PLACEHOLDER)
+
+        data = {"query": {"match_all": {}}, "_source": ["youtube_id"]}
+        results = IndexPaginate(self.INDEX_NAME, data).iter_results()
+        batch = []
+        for result in results:
+            batch.append(result["youtube_id"])
+            if len(batch) >= self.CHUNK_SIZE:
+                self.conn.execute_command("SADD", self.rebuild_key, *batch)
+                batch = []
+
+        if batch:
+            self.conn.execute_command("SADD", self.rebuild_key, *batch)
+
+        self.conn.execute_command("SREM", self.rebuild_key, self.PLACEHOLDER)
+        total = self.conn.execute_command("SCARD", self.rebuild_key)
+        # on empty index keep old set, stale ids fail es confirmation
+        if total:
+            self.conn.execute_command("RENAME", self.rebuild_key, self.key)
+
+        self.conn.execute_command("SET", self.ready_key, 1)
+        print(f"known ids: rebuild done with {total} ids")
+
+        return total
+
+    def _wait_for_index(self) -> None:
+        """wait for primary shards, still recovering after snapshot restore"""
+        timeout = self.RECOVER_TIMEOUT
+        path = f"_cluster/health?wait_for_status=yellow&timeout={timeout}s"
+        _, _ = ElasticWrap(path).get(timeout=timeout + 10)
+
+    def _chunks(self, youtube_ids: list[str]):
+        """yield slices of CHUNK_SIZE"""
+        for start in range(0, len(youtube_ids), self.CHUNK_SIZE):
+            end = start + self.CHUNK_SIZE
+            yield youtube_ids[start:end]
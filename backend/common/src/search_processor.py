@@ -8,7 +8,7 @@ import urllib.parse
 
 from common.src.env_settings import EnvironmentSettings
 from common.src.helper import date_parser, get_duration_str
-from common.src.ta_redis import RedisArchivist
+from common.src.ta_redis import UserProgress
 from download.src.thumbnails import ThumbManager
 
 
@@ -36,18 +36,34 @@ class SearchProcess:
         return self.processed
 
     def get_user_progress(self, match_video_user_progress) -> dict | None:
-        """get user video watch progress"""
+        """get user video watch progress for videos in response"""
         if not match_video_user_progress:
             return None
 
-        query = f"{match_video_user_progress}:progress:*"
-        all_positions = RedisArchivist().list_items(query)
-        if not all_positions:
+        video_ids = self._get_video_ids()
+        if not video_ids:
             return None
 
-        pos_index = {i["youtube_id"]: i["position"] for i in all_positions}
+        pos_index = UserProgress(match_video_user_progress).get_positions(
+            video_ids
+        )
         return pos_index
 
+    def _get_video_ids(self) -> list[str]:
+        """get youtube_ids of all videos in response"""
+        if "_source" in self.response.keys():
+            hits = [self.response]
+        elif "hits" in self.response.keys():
+            hits = self.response["hits"]["hits"]
+        else:
+            return []
+
+        return [
+            i["_source"]["youtube_id"]
+            for i in hits
+            if i.get("_index") == "ta_video"
+        ]
+
     def _process_result(self, result):
         """detect which type of data to process"""
         index = result["_index"]
@@ -157,14 +173,12 @@ class SearchProcess:
         video_id = download_dict["youtube_id"]
         cache_root = EnvironmentSettings().get_cache_root()
         vid_thumb_url = ThumbManager(video_id).vid_thumb_path()
-        published = date_parser(download_dict["published"])
+        download_dict["vid_thumb_url"] = f"{cache_root}/{vid_thumb_url}"
+        # fast added items get published with metadata later
+        if download_dict.get("published"):
+            published = date_parser(download_dict["published"])
+            download_dict["published"] = published
 
-        download_dict.update(
-            {
-                "vid_thumb_url": f"{cache_root}/{vid_thumb_url}",
-                "published": published,
-            }
-        )
         return dict(sorted(download_dict.items()))
 
     def _process_comment(self, comment_dict):
@@ -6,24 +6,91 @@ functionality:
 """
 
 import json
+import os
+import re
+from contextlib import contextmanager
+from threading import Lock
+from time import sleep, time
 
 import redis
 from common.src.env_settings import EnvironmentSettings
+from redis.client import Pipeline
 
 
 class RedisBase:
-    """connection base for redis"""
+    """
+    connection base for redis
+    all instances share one connection pool per process
+    pass conn to bind an instance to an open pipeline
+    """
 
     NAME_SPACE: str = EnvironmentSettings.REDIS_NAME_SPACE
 
-    def __init__(self):
-        self.conn = redis.from_url(
-            url=EnvironmentSettings.REDIS_CON, decode_responses=True
-        )
+    _pool: redis.BlockingConnectionPool | None = None
+    _pid: int | None = None
+    _lock = Lock()
+
+    def __init__(self, conn: redis.Redis | None = None):
+        if conn is None:
+            conn = redis.Redis(connection_pool=self.get_pool())
+
+        self.conn = conn
+
+    @staticmethod
+    def get_pool() -> redis.BlockingConnectionPool:
+        """get connection pool for current process, rebuild after fork"""
+        pid = os.getpid()
+        if RedisBase._pool is None or RedisBase._pid != pid:
+            with RedisBase._lock:
+                if RedisBase._pool is None or RedisBase._pid != pid:
+                    RedisBase._pool = redis.BlockingConnectionPool.from_url(
+                        url=EnvironmentSettings.REDIS_CON,
+                        decode_responses=True,
+                        max_connections=EnvironmentSettings.REDIS_MAX_CON,
+                        health_check_interval=30,
+                    )
+                    RedisBase._pid = pid
+
+        return RedisBase._pool
+
+    @classmethod
+    @contextmanager
+    def pipeline(cls, conn: redis.Redis | None = None):
+        """
+        batch write commands, sent in one round trip on exit
+        joins conn if that is already a pipeline
+        """
+        if isinstance(conn, Pipeline):
+            yield conn
+            return
+
+        if conn is None:
+            conn = redis.Redis(connection_pool=cls.get_pool())
+
+        pipe = conn.pipeline(transaction=False)
+        yield pipe
+        pipe.execute()
+
+    @staticmethod
+    def get_stats() -> dict[str, int]:
+        """connection stats of pool in current process"""
+        # pylint: disable=protected-access
+        pool = RedisBase._pool
+        if pool is None or RedisBase._pid != os.getpid():
+            return {"connections": 0, "max_connections": 0}
+
+        return {
+            "connections": len(pool._connections),
+            "max_connections": pool.max_connections,
+        }
 
 
 class RedisArchivist(RedisBase):
-    """collection of methods to interact with redis"""
+    """
+    collection of methods to interact with redis
+    keys of hot groups get tracked in a set keys:<group>
+    to list them without scanning the whole keyspace
+    """
 
     CHANNELS: list[str] = [
         "download",
@@ -34,6 +101,10 @@ class RedisArchivist(RedisBase):
         "playlistscan",
         "setting",
     ]
+    GROUPS = re.compile(r"^(message)(:|$)")
+    INDEX: str = "keys:"
+    SCAN_COUNT: int = 1000
+    MGET_CHUNK: int = 500
 
     def set_message(
         self,
@@ -46,14 +117,18 @@ class RedisArchivist(RedisBase):
         to_write = (
             json.dumps(message) if isinstance(message, dict) else message
         )
-        self.conn.execute_command("SET", self.NAME_SPACE + key, to_write)
+        with self.pipeline(self.conn) as pipe:
+            pipe.execute_command("SET", self.NAME_SPACE + key, to_write)
 
-        if expire:
-            if isinstance(expire, bool):
-                secs: int = 20
-            else:
-                secs = expire
-            self.conn.execute_command("EXPIRE", self.NAME_SPACE + key, secs)
+            if expire:
+                if isinstance(expire, bool):
+                    secs: int = 20
+                else:
+                    secs = expire
+                pipe.execute_command("EXPIRE", self.NAME_SPACE + key, secs)
+
+            if group := self._get_group(key):
+                pipe.execute_command("SADD", self._index_key(group), key)
 
         if save:
             self.bg_save()
@@ -90,14 +165,21 @@ class RedisArchivist(RedisBase):
         return {"status": False}
 
     def list_keys(self, query: str) -> list:
-        """return all key matches"""
-        reply = self.conn.execute_command(
-            "KEYS", self.NAME_SPACE + query + "*"
-        )
-        if not reply:
-            return []
-
-        return [i.lstrip(self.NAME_SPACE) for i in reply]
+        """return all key matches, from group index if available"""
+        query = query.rstrip("*")
+        group = self._get_group(query)
+        if not group:
+            return self.scan_keys(query)
+
+        index_key = self._index_key(group)
+        members = self.conn.execute_command("SMEMBERS", index_key)
+        return [i for i in members if i.startswith(query)]
+
+    def scan_keys(self, query: str) -> list:
+        """return all key matches with non blocking SCAN"""
+        match = self.NAME_SPACE + query.rstrip("*") + "*"
+        keys = self.conn.scan_iter(match=match, count=self.SCAN_COUNT)
+        return [i.removeprefix(self.NAME_SPACE) for i in keys]
 
     def list_items(self, query: str) -> list:
         """list all matches"""
@@ -105,13 +187,99 @@ class RedisArchivist(RedisBase):
         if not all_matches:
             return []
 
-        return [self.get_message_dict(i) for i in all_matches]
+        items = []
+        expired = []
+        for start in range(0, len(all_matches), self.MGET_CHUNK):
+            end = start + self.MGET_CHUNK
+            keys = all_matches[start:end]
+            values = self.conn.execute_command(
+                "MGET", *[self.NAME_SPACE + i for i in keys]
+            )
+            for key, value in zip(keys, values):
+                if value is None:
+                    expired.append(key)
+                else:
+                    items.append(json.loads(value))
+
+        self._remove_from_index(expired)
+
+        return items
 
     def del_message(self, key: str) -> bool:
         """delete key from redis"""
-        response = self.conn.execute_command("DEL", self.NAME_SPACE + key)
+        pipe = self.conn.pipeline()
+        pipe.execute_command("DEL", self.NAME_SPACE + key)
+        if group := self._get_group(key):
+            pipe.execute_command("SREM", self._index_key(group), key)
+
+        response = pipe.execute()[0]
         return response
 
+    def rebuild_index(self) -> int:
+        """add existing keys of hot groups to their index, returns total"""
+        match = self.NAME_SPACE + "*"
+        pipe = self.conn.pipeline()
+        total = 0
+        for key in self.conn.scan_iter(match=match, count=self.SCAN_COUNT):
+            key = key.removeprefix(self.NAME_SPACE)
+            if group := self._get_group(key):
+                pipe.execute_command("SADD", self._index_key(group), key)
+                total += 1
+
+            if len(pipe) >= self.SCAN_COUNT:
+                pipe.execute()
+
+        pipe.execute()
+        return total
+
+    def _get_group(self, key: str) -> str | None:
+        """get indexed group of key, if any"""
+        matched = self.GROUPS.match(key)
+        if not matched:
+            return None
+
+        return matched.group(1)
+
+    def _index_key(self, group: str) -> str:
+        """build index set key for group"""
+        return f"{self.NAME_SPACE}{self.INDEX}{group}"
+
+    def _remove_from_index(self, keys: list[str]) -> None:
+        """remove expired keys from their group index"""
+        if not keys:
+            return
+
+        with self.pipeline(self.conn) as pipe:
+            for key in keys:
+                if group := self._get_group(key):
+                    pipe.execute_command("SREM", self._index_key(group), key)
+
+    def incr(self, key: str) -> int:
+        """increment counter key, returns new value"""
+        return self.conn.execute_command("INCR", self.NAME_SPACE + key)
+
+    def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        """increment field of hash key"""
+        return self.conn.execute_command(
+            "HINCRBY", self.NAME_SPACE + key, field, amount
+        )
+
+    def hgetall(self, key: str) -> dict:
+        """get all fields of hash key"""
+        return self.conn.hgetall(self.NAME_SPACE + key)
+
+    def publish(self, channel: str, message: str) -> int:
+        """publish message on channel, returns number of receivers"""
+        return self.conn.execute_command(
+            "PUBLISH", self.NAME_SPACE + channel, message
+        )
+
+    def subscribe(self, channel: str) -> redis.client.PubSub:
+        """subscribe to channel, returns pubsub object to listen on"""
+        pubsub = self.conn.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.NAME_SPACE + channel)
+        return pubsub
+
 
 class RedisQueue(RedisBase):
     """
@@ -131,8 +299,21 @@ class RedisQueue(RedisBase):
 
     """
 
-    def __init__(self, queue_name: str):
-        super().__init__()
+    # append after current max score in one round trip
+    ADD_SCRIPT: str = """
+        local last = redis.call('ZRANGE', KEYS[1], -1, -1, 'WITHSCORES')
+        local score = 1
+        if last[2] then
+            score = tonumber(last[2]) + 1
+        end
+        for idx, member in ipairs(ARGV) do
+            redis.call('ZADD', KEYS[1], score + idx - 1, member)
+        end
+        return #ARGV
+    """
+
+    def __init__(self, queue_name: str, conn: redis.Redis | None = None):
+        super().__init__(conn=conn)
         self.key = f"{self.NAME_SPACE}{queue_name}"
 
     def get_all(self) -> list[str]:
@@ -157,17 +338,16 @@ class RedisQueue(RedisBase):
         if not to_add:
             return
 
-        next_score = self._get_next_score()
-        self.conn.zadd(self.key, {to_add: next_score})
+        self.add_list([to_add])
 
     def add_list(self, to_add: list) -> None:
         """add list to queue"""
         if not to_add:
             return
 
-        next_score = self._get_next_score()
-        mapping = {i[1]: next_score + i[0] for i in enumerate(to_add)}
-        self.conn.zadd(self.key, mapping)
+        self.conn.execute_command(
+            "EVAL", self.ADD_SCRIPT, 1, self.key, *to_add
+        )
 
     def max_score(self) -> int | None:
         """get max score"""
@@ -177,14 +357,6 @@ class RedisQueue(RedisBase):
 
         return int(last[0][1])
 
-    def _get_next_score(self) -> float:
-        """get next score in queue to append"""
-        last = self.conn.zrange(self.key, -1, -1, withscores=True)
-        if not last:
-            return 1.0
-
-        return last[0][1] + 1
-
     def get_next(self) -> tuple[str | None, int | None]:
         """return next element in the queue, if available"""
         result = self.conn.zpopmin(self.key)
@@ -200,6 +372,302 @@ class RedisQueue(RedisBase):
         self.conn.delete(self.key)
 
 
+class RedisSchedule(RedisBase):
+    """
+    priority queue of items by due timestamp, using sorted set
+    schedule:{name} member is item, score is epoch when item is due
+
+    schedules in use:
+    schedule:channel_scan       subscribed channels by next expected upload
+    """
+
+    def __init__(self, name: str):
+        super().__init__()
+        self.key = f"{self.NAME_SPACE}schedule:{name}"
+
+    def get_due(self, items: list[str], now: float) -> list[str]:
+        """filter items due at now, unscheduled items are due"""
+        if not items:
+            return []
+
+        scores = self.conn.execute_command("ZMSCORE", self.key, *items)
+        due = [
+            item
+            for item, score in zip(items, scores)
+            if score is None or float(score) <= now
+        ]
+        return due
+
+    def set_due(self, to_set: dict[str, float]) -> None:
+        """set due timestamp of items"""
+        if not to_set:
+            return
+
+        self.conn.zadd(self.key, to_set)
+
+    def remove(self, items: list[str]) -> None:
+        """remove items from schedule"""
+        if not items:
+            return
+
+        self.conn.zrem(self.key, *items)
+
+
+class RedisHashCache(RedisBase):
+    """
+    long lived cache of small values in one hash
+    cache:{name} field is item, expire is refreshed on every write
+
+    caches in use:
+    cache:shorts        youtube_id to shorts classification, 1 or 0
+    """
+
+    def __init__(self, name: str, expire: int):
+        super().__init__()
+        self.key = f"{self.NAME_SPACE}cache:{name}"
+        self.expire = expire
+
+    def get_many(self, items: list[str]) -> dict[str, str]:
+        """get cached values, missing items are left out"""
+        if not items:
+            return {}
+
+        values = self.conn.execute_command("HMGET", self.key, *items)
+        cached = {
+            item: value
+            for item, value in zip(items, values)
+            if value is not None
+        }
+        return cached
+
+    def set_many(self, to_set: dict[str, str]) -> None:
+        """set values, refresh expire"""
+        if not to_set:
+            return
+
+        with self.pipeline(self.conn) as pipe:
+            pipe.hset(self.key, mapping=to_set)
+            pipe.execute_command("EXPIRE", self.key, self.expire)
+
+
+class RedisLease(RedisBase):
+    """
+    expiring lease on an item, claimed atomically
+    lease:{group}:{item} holds the owner token until released or expired
+    """
+
+    # only touch the lease if still held by owner
+    RENEW_SCRIPT: str = """
+        if redis.call('GET', KEYS[1]) == ARGV[1] then
+            return redis.call('EXPIRE', KEYS[1], ARGV[2])
+        end
+        return 0
+    """
+    RELEASE_SCRIPT: str = """
+        if redis.call('GET', KEYS[1]) == ARGV[1] then
+            return redis.call('DEL', KEYS[1])
+        end
+        return 0
+    """
+
+    def __init__(self, group: str, expire: int = 600):
+        super().__init__()
+        self.group = group
+        self.expire = expire
+
+    def claim(self, item: str, owner: str) -> bool:
+        """claim lease, false if held by somebody else"""
+        reply = self.conn.execute_command(
+            "SET", self._key(item), owner, "NX", "EX", self.expire
+        )
+        return bool(reply)
+
+    def is_claimed(self, item: str) -> bool:
+        """check if item is leased by any owner"""
+        return bool(self.conn.execute_command("EXISTS", self._key(item)))
+
+    def renew(self, item: str, owner: str) -> bool:
+        """extend lease, false if lost"""
+        reply = self.conn.execute_command(
+            "EVAL", self.RENEW_SCRIPT, 1, self._key(item), owner, self.expire
+        )
+        return bool(reply)
+
+    def release(self, item: str, owner: str) -> None:
+        """release lease if still owned"""
+        self.conn.execute_command(
+            "EVAL", self.RELEASE_SCRIPT, 1, self._key(item), owner
+        )
+
+    def _key(self, item: str) -> str:
+        """build lease key"""
+        return f"{self.NAME_SPACE}lease:{self.group}:{item}"
+
+
+class RedisRateLimit(RedisBase):
+    """
+    token bucket shared by all workers
+    ratelimit:{name} hash of tokens and last refill timestamp
+    """
+
+    # reserve a token, tokens go negative while callers are waiting
+    RESERVE_SCRIPT: str = """
+        local rate = tonumber(ARGV[1])
+        local burst = tonumber(ARGV[2])
+        local now = tonumber(ARGV[3])
+        local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+        local tokens = tonumber(state[1]) or burst
+        local last = tonumber(state[2]) or now
+        tokens = math.min(burst, tokens + math.max(0, now - last) * rate)
+        tokens = tokens - 1
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+        redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 60)
+        if tokens >= 0 then
+            return '0'
+        end
+        return tostring(-tokens / rate)
+    """
+
+    def __init__(self, name: str, rate: float, burst: int = 1):
+        super().__init__()
+        self.key = f"{self.NAME_SPACE}ratelimit:{name}"
+        self.rate = rate
+        self.burst = burst
+
+    def reserve(self) -> float:
+        """reserve a token, returns seconds to wait before using it"""
+        reply = self.conn.execute_command(
+            "EVAL",
+            self.RESERVE_SCRIPT,
+            1,
+            self.key,
+            self.rate,
+            self.burst,
+            f"{time():.3f}",
+        )
+        return float(reply)
+
+    def acquire(self) -> None:
+        """block until a token is available"""
+        wait = self.reserve()
+        if wait:
+            sleep(wait)
+
+
+class UserProgress(RedisBase):
+    """
+    watch progress per user
+    {user_id}:progress          hash of youtube_id: position
+    {user_id}:progress-ended    sorted set of youtube_id by expiry stamp
+    """
+
+    ENDED_EXPIRE: int = 60 * 60 * 24
+    LEGACY = re.compile(r"^(\d+):progress:([^:]+)$")
+
+    def __init__(self, user_id: int | str):
+        super().__init__()
+        self.key = f"{self.NAME_SPACE}{user_id}:progress"
+        self.ended_key = f"{self.NAME_SPACE}{user_id}:progress-ended"
+
+    def set_position(
+        self,
+        youtube_id: str,
+        position: float,
+        duration: float | None = None,
+    ) -> None:
+        """store position, mark to expire when reaching the end"""
+        with self.pipeline(self.conn) as pipe:
+            pipe.execute_command("HSET", self.key, youtube_id, position)
+            if duration and self._is_ended(position, duration):
+                expire = int(time()) + self.ENDED_EXPIRE
+                pipe.execute_command(
+                    "ZADD", self.ended_key, expire, youtube_id
+                )
+            else:
+                pipe.execute_command("ZREM", self.ended_key, youtube_id)
+
+    def get_positions(self, youtube_ids: list[str]) -> dict[str, float]:
+        """get positions of youtube_ids with progress"""
+        if not youtube_ids:
+            return {}
+
+        self._expire_ended()
+        values = self.conn.execute_command("HMGET", self.key, *youtube_ids)
+
+        return {
+            youtube_id: float(value)
+            for youtube_id, value in zip(youtube_ids, values)
+            if value is not None
+        }
+
+    def get_in_progress(self) -> list[str]:
+        """get youtube_ids started but not finished"""
+        self._expire_ended()
+        all_ids = self.conn.execute_command("HKEYS", self.key)
+        ended = self.conn.execute_command("ZRANGE", self.ended_key, 0, -1)
+        if not ended:
+            return all_ids
+
+        ended_ids = set(ended)
+        return [i for i in all_ids if i not in ended_ids]
+
+    def delete(self, youtube_id: str) -> None:
+        """delete progress of youtube_id"""
+        with self.pipeline(self.conn) as pipe:
+            pipe.execute_command("HDEL", self.key, youtube_id)
+            pipe.execute_command("ZREM", self.ended_key, youtube_id)
+
+    @staticmethod
+    def _is_ended(position: float, duration: float) -> bool:
+        """match watched threshold of the player"""
+        if duration <= 1800:
+            return position / duration >= 0.9
+
+        return position >= duration - 120
+
+    def _expire_ended(self) -> None:
+        """remove finished entries past expiry"""
+        now = int(time())
+        expired = self.conn.execute_command(
+            "ZRANGEBYSCORE", self.ended_key, "-inf", now
+        )
+        if not expired:
+            return
+
+        with self.pipeline(self.conn) as pipe:
+            pipe.execute_command("HDEL", self.key, *expired)
+            pipe.execute_command("ZREM", self.ended_key, *expired)
+
+    @classmethod
+    def migrate(cls) -> int:
+        """move legacy {user_id}:progress:{youtube_id} keys into hashes"""
+        conn = RedisBase().conn
+        match = f"{cls.NAME_SPACE}*:progress:*"
+        migrated = 0
+        user_ids = set()
+        for key in conn.scan_iter(match=match, count=1000):
+            matched = cls.LEGACY.match(key.removeprefix(cls.NAME_SPACE))
+            if not matched:
+                continue
+
+            user_id, youtube_id = matched.groups()
+            value = conn.execute_command("GET", key)
+            if value:
+                position = json.loads(value).get("position", 0)
+                cls(user_id).set_position(youtube_id, position)
+                migrated += 1
+
+            conn.execute_command("DEL", key)
+            user_ids.add(user_id)
+
+        for user_id in user_ids:
+            # key index of the legacy progress group
+            index_key = f"{cls.NAME_SPACE}keys:{user_id}:progress"
+            conn.execute_command("DEL", index_key)
+
+        return migrated
+
+
 class TaskRedis(RedisBase):
     """interact with redis tasks"""
 
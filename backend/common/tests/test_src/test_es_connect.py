@@ -0,0 +1,71 @@
+"""tests for es connect helpers"""
+
+import json
+
+import pytest
+from common.src import es_connect
+from common.src.es_connect import BulkWriter
+
+
+class FakeElasticWrap:
+    """record bulk posts, reject first attempt of every item with 429"""
+
+    requests: list[list[str]] = []
+    rejected: set[str] = set()
+
+    def __init__(self, path):
+        self.path = path
+
+    def post(self, data=False, ndjson=False):
+        """respond like _bulk"""
+        lines = data.splitlines()
+        self.requests.append(lines)
+        items = []
+        for action_line in lines[::2]:
+            doc_id = json.loads(action_line)["index"]["_id"]
+            status = 201
+            if doc_id not in self.rejected:
+                self.rejected.add(doc_id)
+                status = 429
+
+            items.append({"index": {"_id": doc_id, "status": status}})
+
+        return {"errors": True, "items": items}, 200
+
+
+@pytest.fixture(name="fake_wrap")
+def fixture_fake_wrap(monkeypatch):
+    """patch ElasticWrap"""
+    FakeElasticWrap.requests = []
+    FakeElasticWrap.rejected = set()
+    monkeypatch.setattr(es_connect, "ElasticWrap", FakeElasticWrap)
+    monkeypatch.setattr(BulkWriter, "BACKOFF", 0)
+    return FakeElasticWrap
+
+
+def test_bulk_batching_and_retry(fake_wrap):
+    """flush by doc count, retry rejected items"""
+    with BulkWriter(max_docs=2) as bulk:
+        for i in range(3):
+            bulk.index("ta_test", str(i), {"value": i})
+
+    assert bulk.total == 3
+    assert not bulk.failed
+    # every batch is sent twice, first attempt rejected
+    assert len(fake_wrap.requests) == 4
+
+
+def test_bulk_ndjson_lines(fake_wrap):
+    """pair action and source lines"""
+    lines = [
+        json.dumps({"index": {"_index": "ta_test", "_id": "a"}}),
+        json.dumps({"value": 1}),
+        "",
+        json.dumps({"index": {"_index": "ta_test", "_id": "b"}}),
+        json.dumps({"value": 2}),
+    ]
+    with BulkWriter() as bulk:
+        bulk.add_ndjson_lines(lines)
+
+    assert bulk.total == 2
+    assert fake_wrap.requests[0][1] == json.dumps({"value": 1})
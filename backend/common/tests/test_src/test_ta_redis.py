@@ -0,0 +1,35 @@
+"""tests for redis key handling"""
+
+import pytest
+from common.src.ta_redis import RedisArchivist, UserProgress
+
+
+@pytest.mark.parametrize(
+    "position, duration, expected",
+    [
+        (500, 600, False),
+        (540, 600, True),
+        (3400, 3600, False),
+        (3480, 3600, True),
+    ],
+)
+def test_progress_is_ended(position, duration, expected):
+    """match player watched threshold"""
+    assert UserProgress._is_ended(position, duration) is expected
+
+
+def test_progress_legacy_key():
+    """only match legacy string keys"""
+    matched = UserProgress.LEGACY.match("1:progress:2xZ4u8ZoDqs")
+    assert matched.groups() == ("1", "2xZ4u8ZoDqs")
+    assert UserProgress.LEGACY.match("1:progress") is None
+    assert UserProgress.LEGACY.match("1:progress-ended") is None
+
+
+def test_message_group():
+    """message keys are tracked in group index"""
+    archivist = RedisArchivist.__new__(RedisArchivist)
+    assert archivist._get_group("message") == "message"
+    assert archivist._get_group("message:download:abc") == "message"
+    assert archivist._get_group("messages") is None
+    assert archivist._get_group("1:progress:2xZ4u8ZoDqs") is None
@@ -5,6 +5,11 @@ from django.urls import path
 
 urlpatterns = [
     path("ping/", views.PingView.as_view(), name="ping"),
+    path(
+        "auth-check/",
+        views.AuthCheckView.as_view(),
+        name="api-auth-check",
+    ),
     path(
         "refresh/",
         views.RefreshView.as_view(),
@@ -6,8 +6,16 @@ from common.src.searching import SearchForm
 from common.src.ta_redis import RedisArchivist
 from common.src.watched import WatchState
 from common.views_base import AdminOnly, ApiBaseView
+from rest_framework.authentication import (
+    SessionAuthentication,
+    TokenAuthentication,
+)
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from task.tasks import check_reindex
+from user.src.auth_cache import AuthCache
 
 
 class PingView(ApiBaseView):
@@ -27,6 +35,37 @@ class PingView(ApiBaseView):
         return Response(data)
 
 
+class AuthCheckView(APIView):
+    """resolves to /api/auth-check/
+    GET: lightweight auth check for nginx auth_request, no ES or Redis
+    returns 204 if authenticated, 401 otherwise
+    """
+
+    authentication_classes: list = []
+    permission_classes = [AllowAny]
+    authenticators = [SessionAuthentication(), TokenAuthentication()]
+
+    def get(self, request):
+        """check session or token, use cached decision if available"""
+        cache_key = AuthCache.build_key(request)
+        if cache_key and AuthCache.is_valid(cache_key):
+            return Response(status=204)
+
+        for authenticator in self.authenticators:
+            try:
+                user_auth = authenticator.authenticate(request)
+            except AuthenticationFailed:
+                continue
+
+            if user_auth and user_auth[0].is_active:
+                if cache_key:
+                    AuthCache.set_valid(cache_key)
+
+                return Response(status=204)
+
+        return Response(status=401)
+
+
 class RefreshView(ApiBaseView):
     """resolves to /api/refresh/
     GET: get refresh progress
@@ -175,7 +175,7 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS("    ENABLE_CAST is not set"))
             return
 
-        regex = re.compile(r"[^\S\r\n]*auth_request /api/ping/;\n")
+        regex = re.compile(r"[^\S\r\n]*auth_request /api/auth-check/;\n")
         changed = file_overwrite(NGINX, regex, "")
         if changed:
             message = "    ✓ process nginx to enable Cast"
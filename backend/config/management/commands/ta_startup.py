@@ -15,15 +15,18 @@ from appsettings.src.snapshot import ElasticSnapshot
 from common.src.env_settings import EnvironmentSettings
 from common.src.es_connect import ElasticWrap
 from common.src.helper import clear_dl_cache
-from common.src.ta_redis import RedisArchivist
+from common.src.known_ids import KnownIds
+from common.src.ta_redis import RedisArchivist, UserProgress
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import dateformat
 from django_celery_beat.models import CrontabSchedule, PeriodicTasks
+from download.src.extract_cache import ExtractCache
+from download.src.media_move import MediaMove
 from redis.exceptions import ResponseError
 from task.models import CustomPeriodicTask
 from task.src.config_schedule import ScheduleBuilder
 from task.src.task_manager import TaskManager
-from task.tasks import version_check
+from task.tasks import rebuild_known_ids, version_check
 
 TOPIC = """
 
@@ -53,6 +56,11 @@ class Command(BaseCommand):
         self._create_default_schedules()
         self._update_schedule_tz()
         self._init_app_config()
+        self._known_ids_check()
+        self._redis_index()
+        self._mig_user_progress()
+        self._media_device_check()
+        self._prune_extract_cache()
 
     def _mig_app_settings(self) -> None:
         """update from v0.4.13 to v0.5.0, migrate application settings"""
@@ -139,7 +147,7 @@ class Command(BaseCommand):
         self.stdout.write("[4] clear task leftovers")
         TaskManager().fail_pending()
         redis_con = RedisArchivist()
-        to_delete = redis_con.list_keys("message:")
+        to_delete = redis_con.scan_keys("message:")
         if to_delete:
             for key in to_delete:
                 redis_con.del_message(key)
@@ -149,9 +157,11 @@ class Command(BaseCommand):
             )
 
     def _clear_dl_cache(self):
-        """clear leftover files from dl cache"""
-        self.stdout.write("[5] clear leftover files from dl cache")
-        leftover_files = clear_dl_cache(EnvironmentSettings.CACHE_DIR)
+        """clear orphaned files from dl cache"""
+        self.stdout.write("[5] clear orphaned files from dl cache")
+        leftover_files = clear_dl_cache(
+            EnvironmentSettings.CACHE_DIR, EnvironmentSettings.DL_CACHE_MAX_AGE
+        )
         if leftover_files:
             self.stdout.write(
                 self.style.SUCCESS(f"    ✓ cleared {leftover_files} files")
@@ -280,3 +290,60 @@ class Command(BaseCommand):
             self.stdout.write(
                 self.style.SUCCESS(f"      Status code: {status_code}")
             )
+
+    def _known_ids_check(self) -> None:
+        """build known ids set if missing"""
+        self.stdout.write("[12] Check known ids")
+        if KnownIds().is_ready():
+            self.stdout.write(self.style.SUCCESS("    known ids are ready"))
+            return
+
+        rebuild_known_ids.delay()
+        self.stdout.write(
+            self.style.SUCCESS("    ✓ send known ids rebuild task")
+        )
+
+    def _redis_index(self) -> None:
+        """track existing keys of hot groups in their index"""
+        self.stdout.write("[13] Index redis key groups")
+        total = RedisArchivist().rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"    ✓ indexed {total} keys"))
+
+    def _mig_user_progress(self) -> None:
+        """migration: move watch progress keys into per user hashes"""
+        self.stdout.write("[14] migrate watch progress")
+        migrated = UserProgress.migrate()
+        if migrated:
+            self.stdout.write(
+                self.style.SUCCESS(f"    ✓ migrated {migrated} positions")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("    no legacy keys found"))
+
+    def _media_device_check(self) -> None:
+        """warn if archive moves need to copy across filesystems"""
+        self.stdout.write("[15] Check cache and media device")
+        cache_dir = os.path.join(EnvironmentSettings.CACHE_DIR, "download")
+        if MediaMove.same_device(cache_dir, EnvironmentSettings.MEDIA_DIR):
+            self.stdout.write(
+                self.style.SUCCESS("    ✓ cache and media on same device")
+            )
+            return
+
+        message = (
+            "    cache and media are on different devices, "
+            + "finished downloads get copied instead of renamed"
+        )
+        self.stdout.write(self.style.WARNING(message))
+
+    def _prune_extract_cache(self) -> None:
+        """remove expired and oversized extraction cache entries"""
+        self.stdout.write("[16] Prune extraction cache")
+        # max size 0 when disabled, clears all leftover entries
+        removed = ExtractCache.prune()
+        if removed:
+            self.stdout.write(
+                self.style.SUCCESS(f"    ✓ removed {removed} entries")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("    no entries to remove"))
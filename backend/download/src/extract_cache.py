@@ -0,0 +1,152 @@
+"""
+functionality:
+- on disk cache of yt-dlp extraction results
+- keyed by url and option signature, ttl per kind
+- size bounded, least recently used entries get evicted
+"""
+
+import hashlib
+import json
+import os
+import zlib
+from contextlib import suppress
+from threading import Lock, get_ident
+from time import time
+
+import yt_dlp
+from common.src.env_settings import EnvironmentSettings
+
+
+class ExtractCache:
+    """compressed json of a single extract_info response"""
+
+    CACHE_DIR: str = os.path.join(EnvironmentSettings.CACHE_DIR, "extract")
+    MAX_SIZE: int = EnvironmentSettings.EXTRACT_CACHE_SIZE * 1024 * 1024
+    LEVEL: int = 6
+    PRUNE_EVERY: int = 50
+    TTL: dict[str, int] = {
+        "video": 6 * 60 * 60,
+        "channel": 60 * 60,
+        "playlist": 60 * 60,
+        "listing": 60 * 60,
+    }
+    # options not changing the extracted metadata
+    IGNORE_OBS: set[str] = {
+        "check_formats",
+        "extractor_retries",
+        "quiet",
+        "retries",
+        "simulate",
+        "skip_download",
+        "socket_timeout",
+        "writethumbnail",
+    }
+
+    _writes: int = 0
+    _lock = Lock()
+
+    def __init__(self, kind: str, url: str, obs: dict):
+        self.kind = kind
+        file_name = f"{self.get_key(url, obs)}.json.z"
+        self.path = os.path.join(self.CACHE_DIR, kind, file_name)
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """cache is off without max size"""
+        return cls.MAX_SIZE > 0
+
+    @classmethod
+    def get_key(cls, url: str, obs: dict) -> str:
+        """hash of url and extraction relevant options"""
+        to_key = {i: j for i, j in obs.items() if i not in cls.IGNORE_OBS}
+        to_key["cookiefile"] = bool(obs.get("cookiefile"))
+        signature = json.dumps([url, to_key], sort_keys=True, default=repr)
+
+        return hashlib.sha256(signature.encode()).hexdigest()
+
+    def get(self) -> dict | None:
+        """get response if cached and not expired"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+        now = time()
+        if now - stat.st_mtime > self.TTL[self.kind]:
+            return None
+
+        try:
+            with open(self.path, "rb") as f:
+                response = json.loads(zlib.decompress(f.read()))
+        except (OSError, zlib.error, ValueError):
+            return None
+
+        # atime tracks last use for eviction, mtime stays write time
+        # other worker may have pruned the file since reading
+        with suppress(OSError):
+            os.utime(self.path, (now, stat.st_mtime))
+
+        return response
+
+    def set(self, response: dict) -> None:
+        """write response, prune every PRUNE_EVERY writes"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        sanitized = yt_dlp.YoutubeDL.sanitize_info(response)
+        to_write = zlib.compress(json.dumps(sanitized).encode(), self.LEVEL)
+        tmp_path = f"{self.path}.{os.getpid()}.{get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(to_write)
+
+        os.replace(tmp_path, self.path)
+
+        with self._lock:
+            ExtractCache._writes += 1
+            to_prune = ExtractCache._writes % self.PRUNE_EVERY == 0
+
+        if to_prune:
+            self.prune()
+
+    @classmethod
+    def prune(cls) -> int:
+        """delete expired, then least recently used over max size"""
+        if not os.path.exists(cls.CACHE_DIR):
+            return 0
+
+        now = time()
+        removed = 0
+        entries = []
+        for kind in os.listdir(cls.CACHE_DIR):
+            kind_dir = os.path.join(cls.CACHE_DIR, kind)
+            ttl = cls.TTL.get(kind, 0)
+            for file_name in os.listdir(kind_dir):
+                path = os.path.join(kind_dir, file_name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+
+                if now - stat.st_mtime > ttl:
+                    removed += cls._remove(path)
+                    continue
+
+                entries.append((stat.st_atime, stat.st_size, path))
+
+        total = sum(i[1] for i in entries)
+        for _, size, path in sorted(entries):
+            if total <= cls.MAX_SIZE:
+                break
+
+            removed += cls._remove(path)
+            total -= size
+
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        """remove file, ignore if already removed by other worker"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return 0
+
+        return 1
@@ -0,0 +1,152 @@
+"""
+functionality:
+- move finished media files from cache to archive
+- rename on same device, zero copy across devices
+- fsync and verify before removing source
+"""
+
+import errno
+import hashlib
+import os
+import shutil
+from time import monotonic
+
+from common.src.env_settings import EnvironmentSettings
+
+
+class MediaMove:
+    """move a single file, returns throughput metrics"""
+
+    CHUNK_SIZE: int = 64 * 1024 * 1024
+    HASH_CHUNK: int = 1024 * 1024
+    # kernel or filesystem can't do the zero copy call, try next method
+    FALLBACK_ERRNO: tuple[int, ...] = (
+        errno.EXDEV,
+        errno.ENOSYS,
+        errno.EINVAL,
+        errno.EOPNOTSUPP,
+    )
+
+    def __init__(self, src: str, dest: str, verify: str | None = None):
+        self.src = src
+        self.dest = dest
+        self.verify = verify or EnvironmentSettings.MOVE_VERIFY
+
+    def run(self) -> dict:
+        """move file, rename if possible, verified copy otherwise"""
+        start = monotonic()
+        size = os.path.getsize(self.src)
+        try:
+            os.rename(self.src, self.dest)
+            method = "rename"
+        except OSError as err:
+            if err.errno != errno.EXDEV:
+                raise
+
+            method = self._copy_verified()
+
+        seconds = monotonic() - start
+        metrics = {
+            "method": method,
+            "bytes": size,
+            "seconds": round(seconds, 3),
+            "mb_per_s": round(size / 1024**2 / max(seconds, 0.001), 1),
+        }
+        return metrics
+
+    def _copy_verified(self) -> str:
+        """copy to temp file next to dest, verify, then rename"""
+        tmp_path = f"{self.dest}.tmp"
+        src_stat = os.stat(self.src)
+        try:
+            with open(self.src, "rb") as f_src, open(tmp_path, "wb") as f_dest:
+                method = self._copy(f_src.fileno(), f_dest.fileno())
+                f_dest.flush()
+                os.fsync(f_dest.fileno())
+
+            # keep mtime like rename, probe key of media file stays valid
+            times = (src_stat.st_atime_ns, src_stat.st_mtime_ns)
+            os.utime(tmp_path, ns=times)
+
+            self._verify(tmp_path)
+            os.replace(tmp_path, self.dest)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._fsync_dir(os.path.dirname(self.dest))
+        os.remove(self.src)
+
+        return method
+
+    def _copy(self, fd_src: int, fd_dest: int) -> str:
+        """copy with copy_file_range, sendfile or userspace fallback"""
+        for method, copy_func in (
+            ("copy_file_range", self._copy_file_range),
+            ("sendfile", self._sendfile),
+        ):
+            try:
+                copy_func(fd_src, fd_dest)
+                return method
+            except OSError as err:
+                if err.errno not in self.FALLBACK_ERRNO:
+                    raise
+
+                # partial copy from failed method gets overwritten
+                os.lseek(fd_src, 0, os.SEEK_SET)
+                os.lseek(fd_dest, 0, os.SEEK_SET)
+                os.ftruncate(fd_dest, 0)
+
+        with open(fd_src, "rb", closefd=False) as f_src:
+            with open(fd_dest, "wb", closefd=False) as f_dest:
+                shutil.copyfileobj(f_src, f_dest, self.HASH_CHUNK)
+
+        return "copy"
+
+    def _copy_file_range(self, fd_src: int, fd_dest: int) -> None:
+        """copy in kernel space, reflink on supported filesystems"""
+        while os.copy_file_range(fd_src, fd_dest, self.CHUNK_SIZE):
+            pass
+
+    def _sendfile(self, fd_src: int, fd_dest: int) -> None:
+        """copy in kernel space with sendfile"""
+        offset = 0
+        while sent := os.sendfile(fd_dest, fd_src, offset, self.CHUNK_SIZE):
+            offset += sent
+
+    def _verify(self, tmp_path: str) -> None:
+        """compare size, and hash if configured"""
+        src_size = os.path.getsize(self.src)
+        dest_size = os.path.getsize(tmp_path)
+        if src_size != dest_size:
+            raise OSError(f"size mismatch: {src_size} != {dest_size}")
+
+        if self.verify != "hash":
+            return
+
+        if self._get_hash(self.src) != self._get_hash(tmp_path):
+            raise OSError(f"hash mismatch for {self.dest}")
+
+    def _get_hash(self, path: str) -> str:
+        """hash file content"""
+        file_hash = hashlib.blake2b()
+        with open(path, "rb") as f:
+            while chunk := f.read(self.HASH_CHUNK):
+                file_hash.update(chunk)
+
+        return file_hash.hexdigest()
+
+    @staticmethod
+    def _fsync_dir(path: str) -> None:
+        """persist rename in directory entry"""
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def same_device(path_a: str, path_b: str) -> bool:
+        """check if both paths are on the same filesystem"""
+        return os.stat(path_a).st_dev == os.stat(path_b).st_dev
@@ -4,12 +4,16 @@ Functionality:
 - linked with ta_dowload index
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 from appsettings.src.config import AppConfig
-from common.src.es_connect import ElasticWrap, IndexPaginate
-from common.src.helper import get_duration_str, is_shorts, rand_sleep
-from download.src.subscriptions import ChannelSubscription
+from common.src.es_connect import BulkWriter, ElasticWrap, IndexPaginate
+from common.src.helper import get_duration_str, is_missing
+from common.src.known_ids import KnownIds
+from common.src.ta_redis import RedisLease
+from download.src.shorts import ShortsCheck
+from download.src.subscriptions import ChannelSubscription, get_youtube_limit
 from download.src.thumbnails import ThumbManager
 from download.src.yt_dlp_base import YtWrap
 from playlist.src.index import YoutubePlaylist
@@ -20,42 +24,8 @@ class PendingIndex:
     """base class holding all export methods"""
 
     def __init__(self):
-        self.all_pending = False
-        self.all_ignored = False
-        self.all_videos = False
         self.all_channels = False
         self.channel_overwrites = False
-        self.video_overwrites = False
-        self.to_skip = False
-
-    def get_download(self):
-        """get a list of all pending videos in ta_download"""
-        data = {
-            "query": {"match_all": {}},
-            "sort": [{"timestamp": {"order": "asc"}}],
-        }
-        all_results = IndexPaginate("ta_download", data).get_results()
-
-        self.all_pending = []
-        self.all_ignored = []
-        self.to_skip = []
-
-        for result in all_results:
-            self.to_skip.append(result["youtube_id"])
-            if result["status"] == "pending":
-                self.all_pending.append(result)
-            elif result["status"] == "ignore":
-                self.all_ignored.append(result)
-
-    def get_indexed(self):
-        """get a list of all videos indexed"""
-        data = {
-            "query": {"match_all": {}},
-            "sort": [{"published": {"order": "desc"}}],
-        }
-        self.all_videos = IndexPaginate("ta_video", data).get_results()
-        for video in self.all_videos:
-            self.to_skip.append(video["youtube_id"])
 
     def get_channels(self):
         """get a list of all channels indexed"""
@@ -75,18 +45,6 @@ class PendingIndex:
                     {channel_id: channel.get("channel_overwrites")}
                 )
 
-        self._map_overwrites()
-
-    def _map_overwrites(self):
-        """map video ids to channel ids overwrites"""
-        self.video_overwrites = {}
-        for video in self.all_pending:
-            video_id = video["youtube_id"]
-            channel_id = video["channel_id"]
-            overwrites = self.channel_overwrites.get(channel_id, False)
-            if overwrites:
-                self.video_overwrites.update({video_id: overwrites})
-
 
 class PendingInteract:
     """interact with items in download queue"""
@@ -99,12 +57,14 @@ class PendingInteract:
         """delete single item from pending"""
         path = f"ta_download/_doc/{self.youtube_id}"
         _, _ = ElasticWrap(path).delete(refresh=True)
+        KnownIds().discard(self.youtube_id)
 
     def delete_by_status(self):
         """delete all matching item by status"""
         data = {"query": {"term": {"status": {"value": self.status}}}}
         path = "ta_download/_delete_by_query"
         _, _ = ElasticWrap(path).post(data=data)
+        # stale ids fail es confirmation until next rebuild
 
     def update_status(self):
         """update status of pending item"""
@@ -128,6 +88,16 @@ class PendingInteract:
         response, status_code = ElasticWrap(path).get()
         return response["_source"], status_code
 
+    def get_channel_name(self):
+        """get channel name from channel index, fall back to queue"""
+        response, status_code = ElasticWrap(
+            f"ta_channel/_doc/{self.youtube_id}"
+        ).get(print_error=False)
+        if status_code == 200:
+            return response["_source"]["channel_name"]
+
+        return self.get_channel()["channel_name"]
+
     def get_channel(self):
         """
         get channel metadata from queue to not depend on channel to be indexed
@@ -152,6 +122,8 @@ class PendingInteract:
 class PendingList(PendingIndex):
     """manage the pending videos list"""
 
+    LEASE_GROUP: str = "download"
+
     yt_obs = {
         "noplaylist": True,
         "writethumbnail": True,
@@ -164,14 +136,15 @@ class PendingList(PendingIndex):
         self.config = AppConfig().config
         self.youtube_ids = youtube_ids
         self.task = task
-        self.to_skip = False
         self.missing_videos = False
+        self.seen = False
+        self.flat_meta = {}
+        self.fast_added = []
 
     def parse_url_list(self):
         """extract youtube ids from list"""
         self.missing_videos = []
-        self.get_download()
-        self.get_indexed()
+        self.seen = set()
         total = len(self.youtube_ids)
         for idx, entry in enumerate(self.youtube_ids):
             self._process_entry(entry)
@@ -183,6 +156,8 @@ class PendingList(PendingIndex):
                 progress=(idx + 1) / total,
             )
 
+        self._remove_known()
+
     def _process_entry(self, entry):
         """process single entry from url list"""
         vid_type = self._get_vid_type(entry)
@@ -204,20 +179,44 @@ class PendingList(PendingIndex):
 
         return VideoTypeEnum(vid_type_str)
 
-    def _add_video(self, url, vid_type):
-        """add video to list"""
-        if url not in self.missing_videos and url not in self.to_skip:
-            self.missing_videos.append((url, vid_type))
-        else:
-            print(f"{url}: skipped adding already indexed video to download.")
+    def _add_video(self, url, vid_type, flat_meta=None):
+        """add video to list, keep flat metadata for fast add"""
+        if url in self.seen:
+            return
+
+        self.seen.add(url)
+        self.missing_videos.append((url, vid_type))
+        if flat_meta:
+            self.flat_meta[url] = flat_meta
+
+    def _remove_known(self):
+        """remove videos already indexed or in queue"""
+        to_check = [i[0] for i in self.missing_videos]
+        missing = set(is_missing(to_check)) if to_check else set()
+        for youtube_id in to_check:
+            if youtube_id not in missing:
+                print(
+                    f"{youtube_id}: skipped adding already indexed video "
+                    "to download."
+                )
+
+        self.missing_videos = [
+            i for i in self.missing_videos if i[0] in missing
+        ]
 
     def _parse_channel(self, url, vid_type):
         """add all videos of channel to list"""
         video_results = ChannelSubscription().get_last_youtube_videos(
             url, limit=False, query_filter=vid_type
         )
-        for video_id, _, vid_type in video_results:
-            self._add_video(video_id, vid_type)
+        channel_name = PendingInteract(url).get_channel_name()
+        for video_id, title, vid_type in video_results:
+            flat_meta = {
+                "title": title,
+                "channel_id": url,
+                "channel_name": channel_name,
+            }
+            self._add_video(video_id, VideoTypeEnum(vid_type), flat_meta)
 
     def _parse_playlist(self, url):
         """add all videos of playlist to list"""
@@ -229,48 +228,252 @@ class PendingList(PendingIndex):
             raise ValueError(message)
 
         entries = playlist.json_data["playlist_entries"]
-        to_add = [i["youtube_id"] for i in entries if not i["downloaded"]]
+        to_add = [i for i in entries if not i["downloaded"]]
         if not to_add:
             return
 
-        for video_id in to_add:
+        for entry in to_add:
+            # playlist owner is not uploader, channel_id comes with metadata
+            flat_meta = {
+                "title": entry["title"],
+                "channel_name": entry.get("uploader") or "NA",
+            }
             # match vid_type later
-            self._add_video(video_id, VideoTypeEnum.UNKNOWN)
+            self._add_video(
+                entry["youtube_id"], VideoTypeEnum.UNKNOWN, flat_meta
+            )
 
     def add_to_pending(self, status="pending", auto_start=False):
         """add missing videos to pending list"""
+        if self.config["downloads"].get("fast_add"):
+            return self.fast_add_to_pending(status, auto_start)
+
         self.get_channels()
 
+        return self.add_to_pending_extract(status, auto_start)
+
+    def add_to_pending_extract(
+        self, status="pending", auto_start=False, first=None
+    ):
+        """
+        add missing videos with full extraction per video
+        extract in parallel, stream results into bulk writer
+        first: timestamp of first item, defaults to now
+        """
         total = len(self.missing_videos)
+        if not total:
+            return []
+
+        workers = self.config["downloads"].get("extract_workers") or 1
+        rate_limit = get_youtube_limit(self.config)
+        # keep queue order of input, independent of completion order
+        # count up from now to stay behind already queued items
+        if first is None:
+            first = int(datetime.now().timestamp())
         videos_added = []
-        for idx, (youtube_id, vid_type) in enumerate(self.missing_videos):
+        done = 0
+
+        # ids of flushed batches are in es, even if a later batch fails
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(
+                        self._extract_item, youtube_id, vid_type, rate_limit
+                    ): idx
+                    for idx, (youtube_id, vid_type) in enumerate(
+                        self.missing_videos
+                    )
+                }
+                with BulkWriter() as bulk:
+                    for future in as_completed(futures):
+                        video_details = future.result()
+                        self._notify_add(done, total)
+                        done += 1
+                        if video_details:
+                            youtube_id = video_details["youtube_id"]
+                            video_details.update(
+                                {
+                                    "status": status,
+                                    "auto_start": auto_start,
+                                    "timestamp": first + futures[future],
+                                }
+                            )
+                            bulk.index(
+                                "ta_download", youtube_id, video_details
+                            )
+                            videos_added.append(youtube_id)
+
+                        if self.task and self.task.is_stopped():
+                            executor.shutdown(cancel_futures=True)
+                            break
+        finally:
+            KnownIds().add(videos_added)
+
+        return videos_added
+
+    def _extract_item(self, youtube_id, vid_type, rate_limit):
+        """extract single video and download thumbnail, in worker thread"""
+        if rate_limit:
+            rate_limit.acquire()
+
+        print(f"{youtube_id}: add to queue")
+        video_details = self.get_youtube_details(youtube_id, vid_type)
+        if not video_details:
+            return False
+
+        url = video_details["vid_thumb_url"]
+        ThumbManager(youtube_id).download_video_thumb(url)
+
+        return video_details
+
+    def fast_add_to_pending(self, status="pending", auto_start=False):
+        """
+        add videos with flat metadata in one bulk request
+        videos without flat metadata get added with full extraction
+        full metadata gets added later, see add_metadata
+        """
+        self.get_channels()
+        # count up in listing order, youtube_id only breaks ties
+        first = int(datetime.now().timestamp())
+        fast_added = []
+        to_extract = []
+        try:
+            with BulkWriter() as bulk:
+                for youtube_id, vid_type in self.missing_videos:
+                    flat_meta = self.flat_meta.get(youtube_id)
+                    if not flat_meta:
+                        to_extract.append((youtube_id, vid_type))
+                        continue
+
+                    channel_id = flat_meta.get("channel_id")
+                    video_details = flat_meta | {
+                        "youtube_id": youtube_id,
+                        "timestamp": first + len(fast_added),
+                        "vid_type": vid_type.value,
+                        "status": status,
+                        "auto_start": auto_start,
+                        "needs_metadata": True,
+                        "channel_indexed": channel_id in self.all_channels,
+                    }
+                    bulk.index("ta_download", youtube_id, video_details)
+                    fast_added.append(youtube_id)
+        finally:
+            KnownIds().add(fast_added)
+
+        self.fast_added = fast_added
+        print(f"fast added {len(fast_added)} videos to queue")
+
+        self.missing_videos = to_extract
+        videos_added = self.add_to_pending_extract(
+            status, auto_start, first=first + len(fast_added)
+        )
+
+        return fast_added + videos_added
+
+    def add_metadata(self, video_data):
+        """
+        extract full metadata for fast added queue item
+        remove from queue if video can't be downloaded
+        returns False if item is gone from queue
+        """
+        youtube_id = video_data["youtube_id"]
+        vid_type = VideoTypeEnum(video_data["vid_type"])
+        video_details = self.get_youtube_details(youtube_id, vid_type)
+        if not video_details:
+            print(f"{youtube_id}: remove from queue, failed to get metadata")
+            self._delete_fast_added(youtube_id)
+            return False
+
+        # status, auto_start and timestamp stay as in queue
+        for key in ("status", "auto_start", "timestamp"):
+            video_details.pop(key, None)
+
+        video_details["needs_metadata"] = False
+        same_channel = (
+            video_data.get("channel_id") == video_details["channel_id"]
+        )
+        if same_channel and not self.all_channels:
+            video_details["channel_indexed"] = video_data["channel_indexed"]
+
+        url = video_details["vid_thumb_url"]
+        ThumbManager(youtube_id).download_video_thumb(url)
+        if not self._update_fast_added(youtube_id, video_details):
+            print(f"{youtube_id}: skip metadata, removed from queue")
+            return False
+
+        return video_data | video_details
+
+    @staticmethod
+    def _update_fast_added(youtube_id, video_details):
+        """
+        partial update only if still fast added, never recreate item
+        false if item is gone from queue
+        """
+        source = (
+            "if (ctx._source.needs_metadata == true) "
+            + "{ctx._source.putAll(params.doc)} "
+            + "else {ctx.op = 'none'}"
+        )
+        data = {
+            "script": {
+                "source": source,
+                "lang": "painless",
+                "params": {"doc": video_details},
+            }
+        }
+        path = f"ta_download/_update/{youtube_id}?retry_on_conflict=3"
+        _, status_code = ElasticWrap(path).post(data)
+
+        return status_code == 200
+
+    @staticmethod
+    def _delete_fast_added(youtube_id):
+        """delete item from queue only if still fast added"""
+        data = {
+            "query": {
+                "bool": {
+                    "must": [
+                        {"term": {"youtube_id": {"value": youtube_id}}},
+                        {"term": {"needs_metadata": {"value": True}}},
+                    ]
+                }
+            }
+        }
+        path = "ta_download/_delete_by_query?refresh=true"
+        response, _ = ElasticWrap(path).post(data)
+        if response.get("deleted"):
+            KnownIds().discard(youtube_id)
+
+    def add_pending_metadata(self):
+        """
+        add full metadata to all fast added items in queue
+        skip items leased by a download slot, the slot adds metadata itself
+        """
+        self.get_channels()
+        data = {
+            "query": {"term": {"needs_metadata": {"value": True}}},
+            "sort": [{"timestamp": {"order": "asc"}}],
+        }
+        to_add = IndexPaginate("ta_download", data).get_results()
+        lease = RedisLease(self.LEASE_GROUP)
+        rate_limit = get_youtube_limit(self.config)
+        total = len(to_add)
+        added = 0
+        for idx, video_data in enumerate(to_add):
             if self.task and self.task.is_stopped():
                 break
 
-            print(f"{youtube_id}: [{idx + 1}/{total}]: add to queue")
             self._notify_add(idx, total)
-            video_details = self.get_youtube_details(youtube_id, vid_type)
-            if not video_details:
-                rand_sleep(self.config)
+            if lease.is_claimed(video_data["youtube_id"]):
                 continue
 
-            video_details.update(
-                {
-                    "status": status,
-                    "auto_start": auto_start,
-                }
-            )
-
-            url = video_details["vid_thumb_url"]
-            ThumbManager(youtube_id).download_video_thumb(url)
-            es_url = f"ta_download/_doc/{youtube_id}"
-            _, _ = ElasticWrap(es_url).put(video_details)
-            videos_added.append(youtube_id)
+            if rate_limit:
+                rate_limit.acquire()
 
-            if idx != total:
-                rand_sleep(self.config)
+            if self.add_metadata(video_data):
+                added += 1
 
-        return videos_added
+        return added
 
     def _notify_add(self, idx, total):
         """send notification for adding videos to download queue"""
@@ -285,9 +488,13 @@ class PendingList(PendingIndex):
             progress=(idx + 1) / total,
         )
 
-    def get_youtube_details(self, youtube_id, vid_type=VideoTypeEnum.VIDEOS):
-        """get details from youtubedl for single pending video"""
-        vid = YtWrap(self.yt_obs, self.config).extract(youtube_id)
+    def get_youtube_details(self, youtube_id, vid_type=VideoTypeEnum.UNKNOWN):
+        """
+        get details from youtubedl for single pending video
+        vid_type videos or shorts from channel tab or queue is kept
+        """
+        url = f"https://www.youtube.com/watch?v={youtube_id}"
+        vid = YtWrap(self.yt_obs, self.config).extract(url, cache_kind="video")
         if not vid:
             return False
 
@@ -302,7 +509,7 @@ class PendingList(PendingIndex):
 
         if vid["live_status"] == "was_live":
             vid_type = VideoTypeEnum.STREAMS
-        else:
+        elif vid_type not in (VideoTypeEnum.VIDEOS, VideoTypeEnum.SHORTS):
             if self._check_shorts(vid):
                 vid_type = VideoTypeEnum.SHORTS
             else:
@@ -325,7 +532,8 @@ class PendingList(PendingIndex):
             if duration > 60:
                 return False
 
-        return is_shorts(vid["id"])
+        youtube_id = vid["id"]
+        return ShortsCheck().get([youtube_id]).get(youtube_id, False)
 
     def _parse_youtube_details(self, vid, vid_type=VideoTypeEnum.VIDEOS):
         """parse response"""
@@ -0,0 +1,90 @@
+"""
+functionality:
+- classify videos as shorts
+- cache classification in redis
+- seed cache from channel tab listings, probe youtube for the rest
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import requests
+from common.src.es_connect import ElasticSession
+from common.src.helper import is_shorts
+from common.src.ta_redis import RedisHashCache
+from requests.adapters import HTTPAdapter
+from video.src.constants import VideoTypeEnum
+
+
+class ShortsSession(ElasticSession):
+    """pooled requests session for shorts probes, one per process"""
+
+    POOL_SIZE: int = 8
+
+    _session: requests.Session | None = None
+    _pid: int | None = None
+    _lock = Lock()
+
+    @staticmethod
+    def _build() -> requests.Session:
+        """build new session with connection pool"""
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=ShortsSession.POOL_SIZE
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+
+        return session
+
+
+class ShortsCheck:
+    """shorts classification by youtube_id, cached"""
+
+    CACHE_NAME: str = "shorts"
+    EXPIRE: int = 90 * 24 * 60 * 60
+
+    def __init__(self):
+        self.cache = RedisHashCache(self.CACHE_NAME, self.EXPIRE)
+
+    def get(self, youtube_ids: list[str]) -> dict[str, bool]:
+        """get classification, probe uncached ids concurrently"""
+        cached = self.cache.get_many(youtube_ids)
+        classified = {i: value == "1" for i, value in cached.items()}
+        to_probe = [i for i in youtube_ids if i not in classified]
+        if to_probe:
+            probed = self._probe(to_probe)
+            self.set(probed)
+            classified.update(probed)
+
+        return classified
+
+    def set(self, classified: dict[str, bool]) -> None:
+        """store classification"""
+        to_set = {i: "1" if value else "0" for i, value in classified.items()}
+        self.cache.set_many(to_set)
+
+    def seed(self, last_videos: list[tuple[str, str, str]]) -> None:
+        """store classification from channel tab listing"""
+        classified = {
+            video_id: vid_type == VideoTypeEnum.SHORTS.value
+            for video_id, _, vid_type in last_videos
+        }
+        self.set(classified)
+
+    def _probe(self, youtube_ids: list[str]) -> dict[str, bool]:
+        """probe youtube, failed probes are left out and not cached"""
+        session = ShortsSession.get()
+        workers = min(len(youtube_ids), ShortsSession.POOL_SIZE)
+        probed = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                youtube_id: executor.submit(is_shorts, youtube_id, session)
+                for youtube_id in youtube_ids
+            }
+            for youtube_id, future in futures.items():
+                try:
+                    probed[youtube_id] = future.result()
+                except requests.exceptions.RequestException as err:
+                    print(f"{youtube_id}: shorts probe failed: {err}")
+
+        return probed
@@ -4,21 +4,38 @@ Functionality:
 - handle playlist subscriptions
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from time import time
+
 from appsettings.src.config import AppConfig
 from channel.src.index import YoutubeChannel
-from common.src.es_connect import IndexPaginate
-from common.src.helper import is_missing, rand_sleep
+from common.src.es_connect import ElasticWrap, IndexPaginate
+from common.src.helper import is_missing
+from common.src.ta_redis import RedisRateLimit, RedisSchedule
 from common.src.urlparser import Parser
+from download.src.shorts import ShortsCheck
 from download.src.thumbnails import ThumbManager
 from download.src.yt_dlp_base import YtWrap
 from playlist.src.index import YoutubePlaylist
+from task.models import CustomPeriodicTask
 from video.src.constants import VideoTypeEnum
 from video.src.index import YoutubeVideo
 
 
+def get_youtube_limit(config) -> RedisRateLimit | None:
+    """youtube rate limit shared by all workers, from sleep interval"""
+    sleep_interval = config["downloads"].get("sleep_interval")
+    if not sleep_interval:
+        return None
+
+    return RedisRateLimit("youtube", rate=1 / sleep_interval)
+
+
 class ChannelSubscription:
     """manage the list of channels subscribed"""
 
+    CURSOR_SIZE: int = 5
+
     def __init__(self, task=False):
         self.config = AppConfig().config
         self.task = task
@@ -44,8 +61,14 @@ class ChannelSubscription:
         limit=True,
         query_filter=None,
         channel_overwrites=None,
+        cursor=None,
+        rate_limit=None,
     ):
-        """get a list of last videos from channel"""
+        """
+        get a list of last videos from channel
+        with cursor, stop each tab at the first already seen video
+        with rate_limit, acquire once per tab extraction
+        """
         query_handler = VideoQueryBuilder(self.config, channel_overwrites)
         queries = query_handler.build_queries(query_filter)
         last_videos = []
@@ -61,57 +84,139 @@ class ChannelSubscription:
                 obs["playlistend"] = limit_amount
 
             url = f"https://www.youtube.com/channel/{channel_id}/{vid_type}"
-            channel_query = YtWrap(obs, self.config).extract(url)
-            if not channel_query:
+            if rate_limit:
+                rate_limit.acquire()
+
+            if cursor is not None:
+                stop_ids = set(cursor.get(vid_type) or [])
+                entries = YtWrap(obs, self.config).extract_until(url, stop_ids)
+            else:
+                channel_query = YtWrap(obs, self.config).extract(
+                    url, cache_kind="listing"
+                )
+                entries = channel_query and channel_query["entries"]
+
+            if not entries:
                 continue
 
             last_videos.extend(
-                [
-                    (i["id"], i["title"], vid_type)
-                    for i in channel_query["entries"]
-                ]
+                [(i["id"], i["title"], vid_type) for i in entries]
             )
 
+        # tab listing classifies shorts for free, skips later probes
+        ShortsCheck().seed(last_videos)
+
         return last_videos
 
-    def find_missing(self):
+    def find_missing(self, scan_all=False):
         """add missing videos from subscribed channels to pending"""
         all_channels = self.get_channels()
         if not all_channels:
             return False
 
-        missing_videos = []
+        schedule = None
+        if max_stale := ChannelScanSchedule.get_max_stale():
+            schedule = ChannelScanSchedule(max_stale)
+            if not scan_all:
+                all_channels = schedule.filter_due(all_channels)
+                print(f"scan {len(all_channels)} due channels")
 
+        scanned = []
+        workers = self.config["subscriptions"].get("scan_workers") or 1
+        rate_limit = get_youtube_limit(self.config)
         total = len(all_channels)
-        for idx, channel in enumerate(all_channels):
-            channel_id = channel["channel_id"]
-            print(f"{channel_id}: find missing videos.")
-            last_videos = self.get_last_youtube_videos(
-                channel_id,
-                channel_overwrites=channel.get("channel_overwrites"),
-            )
+        results: list[list[tuple[str, str]]] = [[] for _ in all_channels]
+        done = 0
 
-            if last_videos:
-                ids_to_add = is_missing([i[0] for i in last_videos])
-                for video_id, _, vid_type in last_videos:
-                    if video_id in ids_to_add:
-                        missing_videos.append((video_id, vid_type))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self._scan_channel, channel, rate_limit): idx
+                for idx, channel in enumerate(all_channels)
+            }
+            for future in as_completed(futures):
+                idx = futures[future]
+                results[idx] = future.result()
+                scanned.append(all_channels[idx]["channel_id"])
+                done += 1
+                if not self.task:
+                    continue
+
+                if self.task.is_stopped():
+                    self.task.send_progress(["Received Stop signal."])
+                    executor.shutdown(cancel_futures=True)
+                    break
 
-            if not self.task:
-                continue
+                self.task.send_progress(
+                    message_lines=[f"Scanning Channel {done}/{total}"],
+                    progress=done / total,
+                )
 
-            if self.task.is_stopped():
-                self.task.send_progress(["Received Stop signal."])
-                break
+        if schedule:
+            schedule.update(scanned)
 
-            self.task.send_progress(
-                message_lines=[f"Scanning Channel {idx + 1}/{total}"],
-                progress=(idx + 1) / total,
-            )
-            rand_sleep(self.config)
+        # keep channel order, independent of completion order
+        missing_videos = [i for result in results for i in result]
 
         return missing_videos
 
+    def _scan_channel(
+        self, channel: dict, rate_limit: RedisRateLimit | None
+    ) -> list[tuple[str, str]]:
+        """find missing videos of a single channel"""
+        channel_id = channel["channel_id"]
+        print(f"{channel_id}: find missing videos.")
+        cursor = channel.get("channel_scan_cursor") or {}
+        last_videos = self.get_last_youtube_videos(
+            channel_id,
+            channel_overwrites=channel.get("channel_overwrites"),
+            cursor=cursor,
+            rate_limit=rate_limit,
+        )
+        if not last_videos:
+            return []
+
+        ids_to_add = set(is_missing([i[0] for i in last_videos]))
+        self._update_cursor(channel_id, cursor, last_videos, ids_to_add)
+        missing = [
+            (video_id, vid_type)
+            for video_id, _, vid_type in last_videos
+            if video_id in ids_to_add
+        ]
+
+        return missing
+
+    def _update_cursor(
+        self,
+        channel_id: str,
+        cursor: dict[str, list[str]],
+        last_videos: list[tuple[str, str, str]],
+        ids_to_add: set[str],
+    ) -> None:
+        """
+        store newest known video ids per tab in channel
+        missing videos are not known until queued, so the cursor stays
+        older than the oldest missing video and the next scan lists it again
+        """
+        new_cursor = cursor.copy()
+        for vid_type in {i[2] for i in last_videos}:
+            new_ids = [i[0] for i in last_videos if i[2] == vid_type]
+            missing_idx = [
+                idx for idx, i in enumerate(new_ids) if i in ids_to_add
+            ]
+            if missing_idx:
+                start = missing_idx[-1] + 1
+                new_ids = new_ids[start:]
+
+            seen = new_ids + (cursor.get(vid_type) or [])
+            new_cursor[vid_type] = seen[: self.CURSOR_SIZE]
+
+        if new_cursor == cursor:
+            return
+
+        data = {"doc": {"channel_scan_cursor": new_cursor}}
+        path = f"ta_channel/_update/{channel_id}"
+        _, _ = ElasticWrap(path).post(data=data)
+
     @staticmethod
     def change_subscribe(channel_id, channel_subscribed):
         """subscribe or unsubscribe from channel and update"""
@@ -120,10 +225,104 @@ class ChannelSubscription:
         channel.json_data["channel_subscribed"] = channel_subscribed
         channel.upload_to_es()
         channel.sync_to_videos()
+        if not channel_subscribed:
+            RedisSchedule(ChannelScanSchedule.NAME).remove([channel_id])
 
         return channel.json_data
 
 
+class ChannelScanSchedule:
+    """
+    scan channels when their next upload is expected
+    based on upload frequency of indexed videos
+    """
+
+    NAME: str = "channel_scan"
+    HISTORY_DAYS: int = 365
+    MIN_RECHECK: int = 60 * 60
+
+    def __init__(self, max_stale_days: int):
+        self.max_stale = max_stale_days * 24 * 60 * 60
+        self.schedule = RedisSchedule(self.NAME)
+
+    @staticmethod
+    def get_max_stale() -> int | None:
+        """get max days between scans from task config, None to disable"""
+        try:
+            task = CustomPeriodicTask.objects.get(name="update_subscribed")
+        except CustomPeriodicTask.DoesNotExist:
+            return None
+
+        return task.task_config.get("days")
+
+    def filter_due(self, channels: list[dict]) -> list[dict]:
+        """filter channels due for scanning"""
+        channel_ids = [i["channel_id"] for i in channels]
+        due = set(self.schedule.get_due(channel_ids, time()))
+
+        return [i for i in channels if i["channel_id"] in due]
+
+    def update(self, channel_ids: list[str]) -> None:
+        """schedule next scan of scanned channels"""
+        if not channel_ids:
+            return
+
+        now = time()
+        history = self._get_history(channel_ids)
+        to_set = {
+            channel_id: self.get_due(now, *history.get(channel_id, (0, None)))
+            for channel_id in channel_ids
+        }
+        self.schedule.set_due(to_set)
+
+    def get_due(self, now: float, last: float, interval: float | None):
+        """next expected upload, recheck if overdue, max stale as cap"""
+        if interval is None:
+            return now + self.max_stale
+
+        recheck = min(max(interval / 4, self.MIN_RECHECK), self.max_stale)
+        due = max(last + interval, now + recheck)
+
+        return min(due, now + self.max_stale)
+
+    def _get_history(
+        self, channel_ids: list[str]
+    ) -> dict[str, tuple[float, float | None]]:
+        """last upload and average upload interval in secs by channel"""
+        must_list = [
+            {"terms": {"channel.channel_id": channel_ids}},
+            {"range": {"published": {"gte": f"now-{self.HISTORY_DAYS}d"}}},
+        ]
+        data = {
+            "size": 0,
+            "query": {"bool": {"must": must_list}},
+            "aggs": {
+                "channels": {
+                    "terms": {
+                        "field": "channel.channel_id",
+                        "size": len(channel_ids),
+                    },
+                    "aggs": {
+                        "first": {"min": {"field": "published"}},
+                        "last": {"max": {"field": "published"}},
+                    },
+                }
+            },
+        }
+        response, _ = ElasticWrap("ta_video/_search").get(data=data)
+        buckets = response["aggregations"]["channels"]["buckets"]
+
+        history = {}
+        for bucket in buckets:
+            first = bucket["first"]["value"] / 1000
+            last = bucket["last"]["value"] / 1000
+            count = bucket["doc_count"]
+            interval = (last - first) / (count - 1) if count > 1 else None
+            history[bucket["key"]] = (last, interval)
+
+        return history
+
+
 class VideoQueryBuilder:
     """Build queries for yt-dlp."""
 
@@ -289,8 +488,12 @@ class PlaylistSubscription:
             return False
 
         missing_videos = []
+        rate_limit = get_youtube_limit(self.config)
         total = len(all_playlists)
         for idx, playlist_id in enumerate(all_playlists):
+            if rate_limit:
+                rate_limit.acquire()
+
             playlist = YoutubePlaylist(playlist_id)
             is_active = playlist.update_playlist()
             if not is_active:
@@ -321,7 +524,6 @@ class PlaylistSubscription:
                 message_lines=[f"Scanning Playlists {idx + 1}/{total}"],
                 progress=(idx + 1) / total,
             )
-            rand_sleep(self.config)
 
         return missing_videos
 
@@ -329,8 +531,9 @@ class PlaylistSubscription:
 class SubscriptionScanner:
     """add missing videos to queue"""
 
-    def __init__(self, task=False):
+    def __init__(self, task=False, scan_all=False):
         self.task = task
+        self.scan_all = scan_all
         self.missing_videos = False
         self.auto_start = AppConfig().config["subscriptions"].get("auto_start")
 
@@ -349,7 +552,7 @@ class SubscriptionScanner:
     def scan_channels(self):
         """get missing from channels"""
         channel_handler = ChannelSubscription(task=self.task)
-        missing = channel_handler.find_missing()
+        missing = channel_handler.find_missing(scan_all=self.scan_all)
         if not missing:
             return
 
@@ -7,18 +7,41 @@ functionality:
 import base64
 import os
 from io import BytesIO
+from threading import Lock
 from time import sleep
 
 import requests
 from common.src.env_settings import EnvironmentSettings
-from common.src.es_connect import ElasticWrap, IndexPaginate
+from common.src.es_connect import ElasticSession, ElasticWrap, IndexPaginate
 from common.src.helper import is_missing
 from mutagen.mp4 import MP4, MP4Cover
 from PIL import Image, ImageFile, ImageFilter, UnidentifiedImageError
+from requests.adapters import HTTPAdapter
 
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
 
+class ThumbSession(ElasticSession):
+    """pooled requests session for thumbnail downloads, one per process"""
+
+    POOL_SIZE: int = 10
+
+    _session: requests.Session | None = None
+    _pid: int | None = None
+    _lock = Lock()
+
+    @staticmethod
+    def _build() -> requests.Session:
+        """build new session with connection pool"""
+        pool_size = ThumbSession.POOL_SIZE
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        return session
+
+
 class ThumbManagerBase:
     """base class for thumbnail management"""
 
@@ -39,10 +62,10 @@ class ThumbManagerBase:
 
         for i in range(3):
             try:
-                response = requests.get(url, stream=True, timeout=5)
+                response = ThumbSession.get().get(url, timeout=5)
                 if response.ok:
                     try:
-                        img = Image.open(response.raw)
+                        img = Image.open(BytesIO(response.content))
                         if isinstance(img, Image.Image):
                             return img
                         return self.get_fallback()
@@ -344,8 +367,9 @@ class ThumbValidator:
                 callback=ValidatorCallback,
                 task=self.task,
                 total=total,
+                slices=EnvironmentSettings.ES_SLICES,
             )
-            _ = paginate.get_results()
+            paginate.run()
 
     def clean_up(self):
         """clean up all thumbs"""
@@ -386,7 +410,7 @@ class ThumbValidator:
             "query": {"bool": {"should": should_list}},
             "_source": ["youtube_id"],
         }
-        result = IndexPaginate("ta_video,ta_download", data).get_results()
+        result = IndexPaginate("ta_video,ta_download", data).iter_results()
         thumbs_should = {i["youtube_id"] for i in result}
 
         return thumbs_should
@@ -460,8 +484,9 @@ class ThumbFilesystem:
             callback=EmbedCallback,
             task=self.task,
             total=self._get_total(),
+            slices=EnvironmentSettings.ES_SLICES,
         )
-        _ = paginate.get_results()
+        paginate.run()
 
     def _get_total(self):
         """get total documents in index"""
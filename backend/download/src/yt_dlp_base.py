@@ -2,16 +2,128 @@
 functionality:
 - base class to make all calls to yt-dlp
 - handle yt-dlp errors
+- pool yt-dlp instances
 """
 
+import json
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 from http import cookiejar
 from io import StringIO
+from threading import Lock
 
 import yt_dlp
 from appsettings.src.config import AppConfig
 from common.src.ta_redis import RedisArchivist
 from django.conf import settings
+from download.src.extract_cache import ExtractCache
+
+
+def dump_cookie(ydl: yt_dlp.YoutubeDL) -> str | None:
+    """serialize cookie jar of instance, None if cookies are not used"""
+    if ydl.params.get("cookiefile") is None:
+        return None
+
+    cookie_io = StringIO()
+    ydl.cookiejar.save(cookie_io)
+
+    return cookie_io.getvalue()
+
+
+class YtPool:
+    """
+    reuse YoutubeDL instances per process, keyed by option signature
+    instances are checked out exclusively, YoutubeDL is not thread safe
+    instance is rebuilt if the stored cookie changed since last use
+    """
+
+    MAX_IDLE: int = 4
+    MAX_KEYS: int = 16
+
+    _idle: OrderedDict[str, list[tuple[yt_dlp.YoutubeDL, str | None]]] = (
+        OrderedDict()
+    )
+    _pid: int | None = None
+    _lock = Lock()
+
+    @classmethod
+    @contextmanager
+    def checkout(cls, obs: dict):
+        """yield instance for obs, return to pool after success"""
+        key = cls.get_key(obs)
+        cookie = (
+            obs["cookiefile"].getvalue() if obs.get("cookiefile") else None
+        )
+        ydl = cls._pop(key, cookie) if key else None
+        if ydl is None:
+            # yt-dlp adds defaults to params in place, keep obs clean
+            ydl = yt_dlp.YoutubeDL(obs.copy())
+
+        try:
+            yield ydl
+        except BaseException:
+            ydl.close()
+            raise
+
+        if key:
+            cls._push(key, ydl, dump_cookie(ydl))
+        else:
+            ydl.close()
+
+    @staticmethod
+    def get_key(obs: dict) -> str | None:
+        """normalized option signature, None if obs can't be pooled"""
+        to_key = {i: j for i, j in obs.items() if i != "cookiefile"}
+        to_key["cookiefile"] = bool(obs.get("cookiefile"))
+        try:
+            return json.dumps(to_key, sort_keys=True)
+        except TypeError:
+            # hooks and other callables are bound to the caller
+            return None
+
+    @classmethod
+    def _pop(cls, key: str, cookie: str | None) -> yt_dlp.YoutubeDL | None:
+        """get idle instance, discard if cookie is outdated"""
+        with cls._lock:
+            if cls._pid != os.getpid():
+                cls._idle = OrderedDict()
+                cls._pid = os.getpid()
+
+            idle = cls._idle.get(key)
+            if not idle:
+                return None
+
+            cls._idle.move_to_end(key)
+            ydl, pooled_cookie = idle.pop()
+
+        if pooled_cookie != cookie:
+            ydl.close()
+            return None
+
+        return ydl
+
+    @classmethod
+    def _push(cls, key: str, ydl: yt_dlp.YoutubeDL, cookie: str | None):
+        """return instance to pool, close what doesn't fit"""
+        to_close = []
+        with cls._lock:
+            if cls._pid != os.getpid():
+                to_close.append(ydl)
+            else:
+                idle = cls._idle.setdefault(key, [])
+                cls._idle.move_to_end(key)
+                idle.append((ydl, cookie))
+                if len(idle) > cls.MAX_IDLE:
+                    to_close.append(idle.pop(0)[0])
+
+                while len(cls._idle) > cls.MAX_KEYS:
+                    _, evicted = cls._idle.popitem(last=False)
+                    to_close.extend(i[0] for i in evicted)
+
+        for instance in to_close:
+            instance.close()
 
 
 class YtWrap:
@@ -76,40 +188,98 @@ class YtWrap:
 
                 return False, str(err)
 
-        self._validate_cookie()
+            self._validate_cookie(ydl)
 
         return True, True
 
-    def extract(self, url):
-        """make extract request"""
+    def extract(self, url, cache_kind=None):
+        """
+        make extract request
+        with cache_kind, reuse response from extract cache if enabled
+        """
+        cache = None
+        if cache_kind and ExtractCache.is_enabled():
+            cache = ExtractCache(cache_kind, url, self.obs)
+            if response := cache.get():
+                return response
+
+        try:
+            with YtPool.checkout(self.obs) as ydl:
+                response = ydl.extract_info(url)
+                self._validate_cookie(ydl)
+        except (
+            cookiejar.LoadError,
+            yt_dlp.utils.ExtractorError,
+            yt_dlp.utils.DownloadError,
+        ) as err:
+            return self._handle_extract_error(url, err)
+
+        if cache and response:
+            cache.set(response)
+
+        return response
+
+    def extract_until(self, url, stop_ids):
+        """
+        lazily extract flat playlist entries, newest first
+        stop at first entry in stop_ids, playlistend is the cap
+        """
+        limit = self.obs.get("playlistend")
+        entries = []
         try:
-            response = yt_dlp.YoutubeDL(self.obs).extract_info(url)
-        except cookiejar.LoadError as err:
+            with YtPool.checkout(self.obs) as ydl:
+                response = ydl.extract_info(url, download=False, process=False)
+                if response.get("_type") == "url":
+                    response = ydl.extract_info(
+                        response["url"], download=False, process=False
+                    )
+
+                # entries is a generator, fetches next pages on demand
+                for entry in response.get("entries") or []:
+                    if entry["id"] in stop_ids:
+                        break
+
+                    entries.append(entry)
+                    if limit and len(entries) >= limit:
+                        break
+
+                self._validate_cookie(ydl)
+        except (
+            cookiejar.LoadError,
+            yt_dlp.utils.ExtractorError,
+            yt_dlp.utils.DownloadError,
+        ) as err:
+            return self._handle_extract_error(url, err)
+
+        return entries
+
+    @staticmethod
+    def _handle_extract_error(url, err):
+        """handle yt-dlp extract errors, raise if connection is lost"""
+        if isinstance(err, cookiejar.LoadError):
             print(f"cookie file is invalid: {err}")
             return False
-        except yt_dlp.utils.ExtractorError as err:
+
+        if isinstance(err, yt_dlp.utils.ExtractorError):
             print(f"{url}: failed to extract with message: {err}, continue...")
             return False
-        except yt_dlp.utils.DownloadError as err:
-            if "This channel does not have a" in str(err):
-                return False
-
-            print(f"{url}: failed to get info from youtube with message {err}")
-            if "Temporary failure in name resolution" in str(err):
-                raise ConnectionError("lost the internet, abort!") from err
 
+        if "This channel does not have a" in str(err):
             return False
 
-        self._validate_cookie()
+        print(f"{url}: failed to get info from youtube with message {err}")
+        if "Temporary failure in name resolution" in str(err):
+            raise ConnectionError("lost the internet, abort!") from err
 
-        return response
+        return False
 
-    def _validate_cookie(self):
-        """check cookie and write it back for next use"""
-        if not self.obs.get("cookiefile"):
+    @staticmethod
+    def _validate_cookie(ydl):
+        """check cookie jar and write it back for next use"""
+        new_cookie = dump_cookie(ydl)
+        if new_cookie is None:
             return
 
-        new_cookie = self.obs["cookiefile"].read()
         old_cookie = RedisArchivist().get_message_str("cookie")
         if new_cookie and old_cookie != new_cookie:
             print("refreshed stored cookie")
@@ -7,11 +7,15 @@ functionality:
 """
 
 import os
-import shutil
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
+from threading import BoundedSemaphore, Lock
+from time import monotonic
+from uuid import uuid4
 
 from appsettings.src.config import AppConfig
-from channel.src.index import YoutubeChannel
+from channel.src.index import ChannelRunCache, YoutubeChannel
 from common.src.env_settings import EnvironmentSettings
 from common.src.es_connect import ElasticWrap, IndexPaginate
 from common.src.helper import (
@@ -19,7 +23,8 @@ from common.src.helper import (
     ignore_filelist,
     rand_sleep,
 )
-from common.src.ta_redis import RedisQueue
+from common.src.ta_redis import RedisBase, RedisLease, RedisQueue
+from download.src.media_move import MediaMove
 from download.src.queue import PendingList
 from download.src.subscriptions import PlaylistSubscription
 from download.src.yt_dlp_base import YtWrap
@@ -47,86 +52,335 @@ class DownloaderBase:
 
 
 class VideoDownloader(DownloaderBase):
-    """handle the video download functionality"""
+    """
+    handle the video download functionality
+    run parallel download slots, each claims items with an expiring lease
+    downloaded files get indexed and archived on a separate bounded pool
+    while the slot already starts the next download
+    """
+
+    LEASE_GROUP: str = PendingList.LEASE_GROUP
+    LEASE_EXPIRE: int = 600
+    LEASE_RENEW: int = 60
+    STAGES: tuple[str, str] = ("Download", "Archive")
+    PROGRESS_SAVE: int = 30
+    THUMB_EXT: tuple[str, ...] = (".webp", ".jpg", ".png")
 
     def __init__(self, task=False):
         super().__init__(task)
         self.obs = False
+        self.slots = self._get_slots()
+        self.lease = RedisLease(self.LEASE_GROUP, expire=self.LEASE_EXPIRE)
+        self.owner = str(uuid4())
+        self._lock = Lock()
+        self._leased: dict[str, float] = {}
+        self._active_channels: dict[str, int] = {}
+        self._claimed_channels: dict[str, str] = {}
+        self._status: dict[tuple[int, int], tuple[list[str], float]] = {}
+        self._archive_pool: ThreadPoolExecutor | None = None
+        self._archive_slots = BoundedSemaphore(self.slots)
+        self._archive_jobs: list[Future] = []
+        self._dl_state: dict[str, dict] = {}
+        self.channel_cache = ChannelRunCache()
         self._build_obs()
 
+    def _get_slots(self) -> int:
+        """number of parallel download slots"""
+        slots = self.config["downloads"].get("parallel_downloads")
+        return max(slots or 1, 1)
+
     def run_queue(self, auto_only=False) -> tuple[int, int]:
-        """setup download queue in redis loop until no more items"""
+        """run download slots until no more items"""
+        run_slot = partial(self._run_slot, auto_only=auto_only)
+        if self.task:
+            run_slot = self.task.bind_thread(run_slot)
+
+        with ThreadPoolExecutor(max_workers=self.slots) as archive_pool:
+            self._archive_pool = archive_pool
+            with ThreadPoolExecutor(max_workers=self.slots) as executor:
+                results = list(executor.map(run_slot, range(self.slots)))
+
+        # archive pool is drained, raise first failure
+        downloaded = sum(job.result() for job in self._archive_jobs)
+        failed = sum(results)
+        self._reset_auto()
+
+        # post processing
+        DownloadPostProcess(self.task).run()
+
+        return downloaded, failed
+
+    def _run_slot(self, slot: int, auto_only: bool) -> int:
+        """claim and download items in one slot, returns failed"""
         downloaded = 0
         failed = 0
         while True:
-            video_data = self._get_next(auto_only)
+            video_data = self._claim_next(auto_only)
             if self.task.is_stopped() or not video_data:
-                self._reset_auto()
+                if video_data:
+                    self._release_channel(video_data["youtube_id"])
+                    self._release_lease(video_data["youtube_id"])
                 break
 
             if downloaded > 0:
                 rand_sleep(self.config)
 
-            youtube_id = video_data["youtube_id"]
-            channel_id = video_data["channel_id"]
-            print(f"{youtube_id}: Downloading video")
-            self._notify(video_data, "Validate download format")
+            if video_data.get("needs_metadata"):
+                video_data = self._add_metadata(video_data, slot)
+                if not video_data:
+                    continue
 
-            success = self._dl_single_vid(youtube_id, channel_id)
-            if not success:
+            if self._download_item(video_data, slot):
+                downloaded += 1
+            else:
                 failed += 1
-                continue
 
-            self._notify(video_data, "Add video metadata to index", progress=1)
-            video_type = VideoTypeEnum(video_data["vid_type"])
-            vid_dict = index_new_video(youtube_id, video_type=video_type)
-            RedisQueue(self.CHANNEL_QUEUE).add(channel_id)
-            RedisQueue(self.VIDEO_QUEUE).add(youtube_id)
+        self._clear_status(slot, 0)
 
-            self._notify(video_data, "Move downloaded file to archive")
+        return failed
+
+    def _add_metadata(self, video_data: dict, slot: int) -> dict | bool:
+        """extract metadata of fast added item, release if removed"""
+        self._notify(video_data, "Extract metadata", slot=slot)
+        enriched = False
+        try:
+            enriched = PendingList().add_metadata(video_data)
+        finally:
+            if not enriched:
+                self._release_channel(video_data["youtube_id"])
+                self._release_lease(video_data["youtube_id"])
+
+        return enriched
+
+    def _download_item(self, video_data: dict, slot: int) -> bool:
+        """download single item, hand off to archive pool"""
+        youtube_id = video_data["youtube_id"]
+        channel_id = video_data["channel_id"]
+        print(f"{youtube_id}: Downloading video")
+        self._notify(video_data, "Validate download format", slot=slot)
+
+        handed_off = False
+        try:
+            success = self._dl_single_vid(
+                youtube_id,
+                channel_id,
+                slot=slot,
+                dl_progress=video_data.get("dl_progress"),
+            )
+            if success:
+                self._submit_archive(video_data, slot)
+                handed_off = True
+        finally:
+            self._release_channel(youtube_id)
+            if not handed_off:
+                self._release_lease(youtube_id)
+
+        return success
+
+    def _submit_archive(self, video_data: dict, slot: int) -> None:
+        """queue archive stage, blocks while archive pool is full"""
+        archive_item = self._archive_item
+        if self.task:
+            archive_item = self.task.bind_thread(archive_item)
+
+        self._archive_slots.acquire()
+        try:
+            job = self._archive_pool.submit(archive_item, video_data, slot)
+        except RuntimeError:
+            self._archive_slots.release()
+            raise
+
+        with self._lock:
+            self._archive_jobs.append(job)
+
+    def _archive_item(self, video_data: dict, slot: int) -> int:
+        """
+        index and archive downloaded item
+        delete from pending only after the file is in the archive
+        """
+        youtube_id = video_data["youtube_id"]
+        channel_id = video_data["channel_id"]
+        try:
+            self._renew(youtube_id)
+            self._notify(
+                video_data,
+                "Add video metadata to index",
+                progress=1,
+                slot=slot,
+                stage=1,
+            )
+            video_type = VideoTypeEnum(video_data["vid_type"])
+            vid_dict = index_new_video(
+                youtube_id,
+                video_type=video_type,
+                channel_cache=self.channel_cache,
+            )
+            with RedisBase.pipeline() as pipe:
+                RedisQueue(self.CHANNEL_QUEUE, conn=pipe).add(channel_id)
+                RedisQueue(self.VIDEO_QUEUE, conn=pipe).add(youtube_id)
+
+            self._renew(youtube_id)
+            self._notify(
+                video_data,
+                "Move downloaded file to archive",
+                progress=1,
+                slot=slot,
+                stage=1,
+            )
             self.move_to_archive(vid_dict)
             self._delete_from_pending(youtube_id)
-            downloaded += 1
-
-        # post processing
-        DownloadPostProcess(self.task).run()
+        finally:
+            self._release_lease(youtube_id)
+            self._clear_status(slot, 1)
+            self._archive_slots.release()
 
-        return downloaded, failed
+        return 1
 
-    def _notify(self, video_data, message, progress=False):
+    def _notify(self, video_data, message, progress=False, slot=0, stage=0):
         """send progress notification to task"""
-        if not self.task:
-            return
-
         typ = VideoTypeEnum(video_data["vid_type"]).value.rstrip("s").title()
         title = video_data.get("title")
-        self.task.send_progress(
-            [f"Processing {typ}: {title}", message], progress=progress
+        self._send_progress(
+            [f"Processing {typ}: {title}", message],
+            progress=progress,
+            slot=slot,
+            stage=stage,
         )
 
-    def _get_next(self, auto_only):
-        """get next item in queue"""
+    def _send_progress(self, message_lines, progress=False, slot=0, stage=0):
+        """send progress, combine lines if more than one item is active"""
+        if not self.task:
+            return
+
+        with self._lock:
+            self._status[(slot, stage)] = (message_lines, progress or 0)
+            if len(self._status) == 1:
+                self.task.send_progress(message_lines, progress=progress)
+                return
+
+            all_lines = []
+            for (idx, stage_idx), (lines, _) in sorted(self._status.items()):
+                name = self.STAGES[stage_idx]
+                all_lines.append(f"[{name} {idx + 1}] {' - '.join(lines)}")
+
+            total = sum(i[1] for i in self._status.values())
+            progress = total / len(self._status)
+            self.task.send_progress(all_lines, progress=progress)
+
+    def _clear_status(self, slot: int, stage: int) -> None:
+        """remove finished item from progress"""
+        with self._lock:
+            self._status.pop((slot, stage), None)
+
+    def _claim_next(self, auto_only) -> dict | bool:
+        """claim lease on next available item, page through queue"""
+        channel_cap = self.config["downloads"].get("parallel_per_channel")
+        with self._lock:
+            leased = list(self._leased)
+            capped = [
+                channel_id
+                for channel_id, active in self._active_channels.items()
+                if channel_cap and active >= channel_cap
+            ]
+
+        search_after = None
+        while True:
+            hits = self._get_next(auto_only, leased, capped, search_after)
+            if not hits:
+                return False
+
+            for hit in hits:
+                video_data = hit["_source"]
+                if self._claim(video_data, channel_cap):
+                    return video_data
+
+            search_after = hits[-1]["sort"]
+
+    def _claim(self, video_data: dict, channel_cap: int | None) -> bool:
+        """claim single item, respect channel cap if channel is known"""
+        youtube_id = video_data["youtube_id"]
+        channel_id = video_data.get("channel_id")
+        with self._lock:
+            active = self._active_channels.get(channel_id, 0)
+            if channel_id and channel_cap and active >= channel_cap:
+                return False
+
+            if not self.lease.claim(youtube_id, self.owner):
+                return False
+
+            self._leased[youtube_id] = monotonic()
+            if channel_id:
+                self._active_channels[channel_id] = active + 1
+                self._claimed_channels[youtube_id] = channel_id
+
+        return True
+
+    def _renew(self, youtube_id: str) -> None:
+        """extend lease of item while still working on it"""
+        with self._lock:
+            last_renew = self._leased.get(youtube_id)
+            if not last_renew or monotonic() - last_renew < self.LEASE_RENEW:
+                return
+
+            self._leased[youtube_id] = monotonic()
+
+        if not self.lease.renew(youtube_id, self.owner):
+            print(f"{youtube_id}: lost download lease")
+
+    def _release_channel(self, youtube_id: str) -> None:
+        """
+        free download slot of channel counted at claim time for channel cap
+        metadata extraction can change channel_id of fast added items
+        """
+        with self._lock:
+            channel_id = self._claimed_channels.pop(youtube_id, None)
+            if channel_id:
+                self._active_channels[channel_id] -= 1
+
+    def _release_lease(self, youtube_id: str) -> None:
+        """release lease of item, back to queue if still pending"""
+        self.lease.release(youtube_id, self.owner)
+        with self._lock:
+            self._leased.pop(youtube_id, None)
+            self._dl_state.pop(youtube_id, None)
+
+    def _get_next(
+        self,
+        auto_only: bool,
+        leased: list[str],
+        capped: list[str],
+        search_after: list | None = None,
+    ) -> list[dict]:
+        """get next page of queue, skip own leases and capped channels"""
         must_list = [{"term": {"status": {"value": "pending"}}}]
         must_not_list = [{"exists": {"field": "message"}}]
         if auto_only:
             must_list.append({"term": {"auto_start": {"value": True}}})
 
+        if leased:
+            must_not_list.append({"terms": {"youtube_id": leased}})
+
+        if capped:
+            must_not_list.append({"terms": {"channel_id": capped}})
+
         data = {
-            "size": 1,
+            "size": self.slots * 10,
             "query": {"bool": {"must": must_list, "must_not": must_not_list}},
             "sort": [
                 {"auto_start": {"order": "desc"}},
                 {"timestamp": {"order": "asc"}},
+                {"youtube_id": {"order": "asc"}},
             ],
         }
+        if search_after:
+            data["search_after"] = search_after
+
         path = "ta_download/_search"
         response, _ = ElasticWrap(path).get(data=data)
-        if not response["hits"]["hits"]:
-            return False
 
-        return response["hits"]["hits"][0]["_source"]
+        return response["hits"]["hits"]
 
-    def _progress_hook(self, response):
+    def _progress_hook(self, response, slot=0):
         """process the progress_hooks from yt_dlp"""
         progress = False
         try:
@@ -142,9 +396,13 @@ class VideoDownloader(DownloaderBase):
         except KeyError:
             message = "processing"
 
+        self._renew(response["info_dict"]["id"])
+        if response.get("status") == "downloading":
+            self._save_dl_progress(response)
+
         if self.task:
             title = response["info_dict"]["title"]
-            self.task.send_progress([title, message], progress=progress)
+            self._send_progress([title, message], progress=progress, slot=slot)
 
     def _build_obs(self):
         """collection to build all obs passed to yt-dlp"""
@@ -157,7 +415,6 @@ class VideoDownloader(DownloaderBase):
         self.obs = {
             "merge_output_format": "mp4",
             "outtmpl": (self.CACHE_DIR + "/download/%(id)s.mp4"),
-            "progress_hooks": [self._progress_hook],
             "noprogress": True,
             "continuedl": True,
             "writethumbnail": False,
@@ -223,31 +480,113 @@ class VideoDownloader(DownloaderBase):
         if overwrites and overwrites.get("download_format"):
             obs["format"] = overwrites.get("download_format")
 
-    def _dl_single_vid(self, youtube_id: str, channel_id: str) -> bool:
-        """download single video"""
+    def _dl_single_vid(
+        self,
+        youtube_id: str,
+        channel_id: str,
+        slot: int = 0,
+        dl_progress: dict | None = None,
+    ) -> bool:
+        """download single video, resume partial download if possible"""
         obs = self.obs.copy()
+        obs["progress_hooks"] = [partial(self._progress_hook, slot=slot)]
         self._set_overwrites(obs, channel_id)
         dl_cache = os.path.join(self.CACHE_DIR, "download")
 
-        success, message = YtWrap(obs, self.config).download(youtube_id)
+        resume_format = self._get_resume_format(dl_progress)
+        if resume_format:
+            print(f"{youtube_id}: resume download in {resume_format}")
+            resume_obs = obs | {"format": resume_format}
+            success, message = YtWrap(resume_obs, self.config).download(
+                youtube_id
+            )
+            if not success:
+                print(f"{youtube_id}: resume failed, start from scratch")
+                self._clean_partial(youtube_id)
+
+        if not resume_format or not success:
+            success, message = YtWrap(obs, self.config).download(youtube_id)
+
         if not success:
             self._handle_error(youtube_id, message)
 
         if self.obs["writethumbnail"]:
             # webp files don't get cleaned up automatically
+            # only own files, other slots may be downloading in parallel
             all_cached = ignore_filelist(os.listdir(dl_cache))
-            to_clean = [i for i in all_cached if not i.endswith(".mp4")]
+            to_clean = [
+                i
+                for i in all_cached
+                if i.startswith(youtube_id) and i.endswith(self.THUMB_EXT)
+            ]
             for file_name in to_clean:
                 file_path = os.path.join(dl_cache, file_name)
                 os.remove(file_path)
 
         return success
 
+    def _get_resume_format(self, dl_progress: dict | None) -> str | None:
+        """get format of partial download, if part files are still there"""
+        if not dl_progress or not dl_progress.get("format_id"):
+            return None
+
+        dl_cache = os.path.join(self.CACHE_DIR, "download")
+        for part_file in dl_progress.get("part_files", []):
+            if os.path.exists(os.path.join(dl_cache, part_file)):
+                return dl_progress["format_id"]
+
+        return None
+
+    def _clean_partial(self, youtube_id: str) -> None:
+        """remove leftover partial files of youtube_id"""
+        dl_cache = os.path.join(self.CACHE_DIR, "download")
+        for file_name in ignore_filelist(os.listdir(dl_cache)):
+            if file_name.startswith(f"{youtube_id}."):
+                os.remove(os.path.join(dl_cache, file_name))
+
+    def _save_dl_progress(self, response: dict) -> None:
+        """store partial download state in queue item, throttled"""
+        info_dict = response["info_dict"]
+        youtube_id = info_dict["id"]
+        part_file = os.path.basename(response.get("tmpfilename") or "")
+        now = monotonic()
+        with self._lock:
+            state = self._dl_state.setdefault(
+                youtube_id, {"part_files": [], "saved": 0.0}
+            )
+            if part_file and part_file not in state["part_files"]:
+                state["part_files"].append(part_file)
+
+            if now - state["saved"] < self.PROGRESS_SAVE:
+                return
+
+            state["saved"] = now
+            part_files = state["part_files"].copy()
+
+        if requested := info_dict.get("requested_formats"):
+            format_id = "+".join(i["format_id"] for i in requested)
+        else:
+            format_id = info_dict.get("format_id")
+
+        data = {
+            "doc": {
+                "dl_progress": {
+                    "format_id": format_id,
+                    "part_files": part_files,
+                    "bytes_done": response.get("downloaded_bytes", 0),
+                    "updated": int(datetime.now().timestamp()),
+                }
+            }
+        }
+        path = f"ta_download/_update/{youtube_id}"
+        _, _ = ElasticWrap(path).post(data=data)
+
     @staticmethod
     def _handle_error(youtube_id, message):
         """store error message"""
         data = {"doc": {"message": message}}
-        _, _ = ElasticWrap(f"ta_download/_update/{youtube_id}").post(data=data)
+        path = f"ta_download/_update/{youtube_id}?refresh=true"
+        _, _ = ElasticWrap(path).post(data=data)
 
     def move_to_archive(self, vid_dict):
         """move downloaded video from cache to archive"""
@@ -266,7 +605,12 @@ class VideoDownloader(DownloaderBase):
         old_path = os.path.join(self.CACHE_DIR, "download", media_file)
         new_path = os.path.join(self.MEDIA_DIR, vid_dict["media_url"])
         # move media file and fix permission
-        shutil.move(old_path, new_path, copy_function=shutil.copyfile)
+        metrics = MediaMove(old_path, new_path).run()
+        print(
+            f"{vid_dict['youtube_id']}: moved with {metrics['method']}, "
+            + f"{metrics['bytes'] // 1024**2}MB in {metrics['seconds']}s, "
+            + f"{metrics['mb_per_s']}MB/s"
+        )
         if host_uid and host_gid:
             os.chown(new_path, host_uid, host_gid)
 
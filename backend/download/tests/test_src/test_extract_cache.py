@@ -0,0 +1,68 @@
+"""tests for extraction cache"""
+
+import os
+from io import StringIO
+
+import pytest
+from download.src.extract_cache import ExtractCache
+
+URL = "https://www.youtube.com/watch?v=2xZ4u8ZoDqs"
+
+
+@pytest.fixture(name="cache_dir")
+def fixture_cache_dir(tmp_path, monkeypatch):
+    """isolated cache dir"""
+    monkeypatch.setattr(ExtractCache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(ExtractCache, "MAX_SIZE", 1024 * 1024)
+    return tmp_path
+
+
+def test_key_ignores_download_options():
+    """queue and index extraction share key"""
+    queue_obs = {
+        "noplaylist": True,
+        "simulate": True,
+        "writethumbnail": True,
+        "check_formats": None,
+        "cookiefile": StringIO("cookie"),
+    }
+    index_obs = {
+        "noplaylist": True,
+        "skip_download": True,
+        "check_formats": "selected",
+        "cookiefile": StringIO("other"),
+    }
+    key = ExtractCache.get_key(URL, queue_obs)
+    assert key == ExtractCache.get_key(URL, index_obs)
+    assert key != ExtractCache.get_key(URL, {"noplaylist": True})
+
+
+def test_roundtrip_and_expire(cache_dir):
+    """cached response expires after ttl"""
+    cache = ExtractCache("video", URL, {})
+    assert cache.get() is None
+
+    cache.set({"id": "2xZ4u8ZoDqs", "duration": 60})
+    assert cache.get()["duration"] == 60
+
+    expired = os.stat(cache.path).st_mtime - ExtractCache.TTL["video"] - 1
+    os.utime(cache.path, (expired, expired))
+    assert cache.get() is None
+    assert ExtractCache.prune() == 1
+    assert not os.listdir(cache_dir / "video")
+
+
+def test_prune_least_recently_used(cache_dir, monkeypatch):
+    """evict oldest atime first until under max size"""
+    caches = [ExtractCache("video", f"{URL}{i}", {}) for i in range(3)]
+    for idx, cache in enumerate(caches):
+        cache.set({"id": str(idx), "data": os.urandom(64).hex()})
+        os.utime(cache.path, (1000 + idx, os.stat(cache.path).st_mtime))
+
+    caches[0].get()
+    max_size = sum(os.path.getsize(i.path) for i in caches) - 1
+    monkeypatch.setattr(ExtractCache, "MAX_SIZE", max_size)
+
+    assert ExtractCache.prune() == 1
+    assert not os.path.exists(caches[1].path)
+    assert os.path.exists(caches[0].path)
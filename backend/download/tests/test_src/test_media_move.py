@@ -0,0 +1,44 @@
+"""tests for moving media files to archive"""
+
+import errno
+import os
+
+import pytest
+from download.src.media_move import MediaMove
+
+
+@pytest.fixture(name="src_file")
+def fixture_src_file(tmp_path):
+    """media file in cache"""
+    src = tmp_path / "cache.mp4"
+    src.write_bytes(os.urandom(1024 * 300))
+    return src
+
+
+def test_move_rename(src_file, tmp_path):
+    """same device moves by rename"""
+    dest = tmp_path / "media.mp4"
+    content = src_file.read_bytes()
+    metrics = MediaMove(str(src_file), str(dest)).run()
+    assert metrics["method"] == "rename"
+    assert dest.read_bytes() == content
+    assert not src_file.exists()
+
+
+def test_move_cross_device(src_file, tmp_path, monkeypatch):
+    """cross device copies, verifies and removes source"""
+
+    def cross_device(*_):
+        raise OSError(errno.EXDEV, "cross device")
+
+    monkeypatch.setattr(os, "rename", cross_device)
+    dest = tmp_path / "media.mp4"
+    content = src_file.read_bytes()
+    os.utime(src_file, ns=(1_000_000_000, 2_000_000_000))
+    metrics = MediaMove(str(src_file), str(dest), verify="hash").run()
+    assert metrics["method"] in ("copy_file_range", "sendfile", "copy")
+    assert metrics["bytes"] == len(content)
+    assert dest.read_bytes() == content
+    assert dest.stat().st_mtime_ns == 2_000_000_000
+    assert not src_file.exists()
+    assert not os.path.exists(f"{dest}.tmp")
@@ -0,0 +1,46 @@
+"""tests for yt-dlp instance pool"""
+
+import os
+from collections import OrderedDict
+from io import StringIO
+
+from download.src.yt_dlp_base import YtPool
+
+
+class FakeYdl:
+    """stand in for YoutubeDL instance"""
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        """track close"""
+        self.closed = True
+
+
+def test_key_normalized():
+    """key ignores order and cookie content"""
+    obs_a = {"quiet": True, "extract_flat": True, "cookiefile": StringIO("a")}
+    obs_b = {"cookiefile": StringIO("b"), "extract_flat": True, "quiet": True}
+    assert YtPool.get_key(obs_a) == YtPool.get_key(obs_b)
+    assert YtPool.get_key(obs_a) != YtPool.get_key({"quiet": True})
+
+
+def test_key_callable():
+    """obs with hooks is not pooled"""
+    assert YtPool.get_key({"progress_hooks": [print]}) is None
+
+
+def test_pop_outdated_cookie(monkeypatch):
+    """instance with outdated cookie is closed, not reused"""
+    monkeypatch.setattr(YtPool, "_idle", OrderedDict())
+    monkeypatch.setattr(YtPool, "_pid", os.getpid())
+    ydl = FakeYdl()
+    YtPool._push("key", ydl, "old")
+    assert YtPool._pop("key", "new") is None
+    assert ydl.closed
+
+    ydl = FakeYdl()
+    YtPool._push("key", ydl, "same")
+    assert YtPool._pop("key", "same") is ydl
+    assert not ydl.closed
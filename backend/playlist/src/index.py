@@ -4,12 +4,11 @@ functionality:
 - index and update in es
 """
 
-import json
 from datetime import datetime
 
 from channel.src import index as channel
 from common.src.env_settings import EnvironmentSettings
-from common.src.es_connect import ElasticWrap, IndexPaginate
+from common.src.es_connect import BulkWriter, ElasticWrap, IndexPaginate
 from common.src.index_generic import YouTubeItem
 from download.src.thumbnails import ThumbManager
 from video.src import index as ta_video
@@ -120,25 +119,17 @@ class YoutubePlaylist(YouTubeItem):
             + "else {ctx.op = 'none'}"
         )
 
-        bulk_list = []
-        for entry in self.json_data["playlist_entries"]:
-            video_id = entry["youtube_id"]
-            action = {"update": {"_id": video_id, "_index": "ta_video"}}
-            source = {
-                "script": {
-                    "source": script,
-                    "lang": "painless",
-                    "params": {"playlist": self.youtube_id},
-                }
+        source = {
+            "script": {
+                "source": script,
+                "lang": "painless",
+                "params": {"playlist": self.youtube_id},
             }
-            bulk_list.append(json.dumps(action))
-            bulk_list.append(json.dumps(source))
-
-        # add last newline
-        bulk_list.append("\n")
-        query_str = "\n".join(bulk_list)
-
-        ElasticWrap("_bulk").post(query_str, ndjson=True)
+        }
+        # entries not downloaded are missing in ta_video
+        with BulkWriter(ignore_status=(404,)) as bulk:
+            for entry in self.json_data["playlist_entries"]:
+                bulk.update("ta_video", entry["youtube_id"], source)
 
     def remove_vids_from_playlist(self):
         """remove playlist ids from videos if needed"""
@@ -83,6 +83,7 @@ class CrontabValidator:
     """validate crontab"""
 
     CONFIG = {
+        "update_subscribed": ["days"],
         "check_reindex": ["days"],
         "run_backup": ["rotate"],
     }
@@ -38,6 +38,13 @@ EXTRACT_DOWNLOAD: TaskItemConfig = {
     "api_stop": True,
 }
 
+PENDING_METADATA: TaskItemConfig = {
+    "title": "Add metadata to download queue",
+    "group": "download:add",
+    "api_start": False,
+    "api_stop": True,
+}
+
 CHECK_REINDEX: TaskItemConfig = {
     "title": "Reindex Documents",
     "group": "reindex:run",
@@ -101,6 +108,20 @@ SUBSCRIBE_TO: TaskItemConfig = {
     "api_stop": False,
 }
 
+REFRESH_MEDIA_STATS: TaskItemConfig = {
+    "title": "Refresh media stats",
+    "group": "setting:mediastats",
+    "api_start": True,
+    "api_stop": False,
+}
+
+REBUILD_KNOWN_IDS: TaskItemConfig = {
+    "title": "Rebuild known video IDs",
+    "group": "setting:knownids",
+    "api_start": True,
+    "api_stop": False,
+}
+
 VERSION_CHECK: TaskItemConfig = {
     "title": "Look for new Version",
     "group": "",
@@ -112,6 +133,7 @@ TASK_CONFIG: dict[str, TaskItemConfig] = {
     "update_subscribed": UPDATE_SUBSCRIBED,
     "download_pending": DOWNLOAD_PENDING,
     "extract_download": EXTRACT_DOWNLOAD,
+    "pending_metadata": PENDING_METADATA,
     "check_reindex": CHECK_REINDEX,
     "manual_import": MANUAL_IMPORT,
     "run_backup": RUN_BACKUP,
@@ -121,5 +143,7 @@ TASK_CONFIG: dict[str, TaskItemConfig] = {
     "resync_thumbs": RESYNC_THUMBS,
     "index_playlists": INDEX_PLAYLISTS,
     "subscribe_to": SUBSCRIBE_TO,
+    "refresh_media_stats": REFRESH_MEDIA_STATS,
+    "rebuild_known_ids": REBUILD_KNOWN_IDS,
     "version_check": VERSION_CHECK,
 }
@@ -6,15 +6,21 @@ Functionality:
 - handle task locking
 """
 
+from threading import Lock, Timer
+from time import monotonic
+
 from appsettings.src.backup import ElasticBackup
-from appsettings.src.config import ReleaseVersion
+from appsettings.src.config import AppConfigCache, ReleaseVersion
 from appsettings.src.filesystem import Scanner
 from appsettings.src.index_setup import ElasitIndexWrap
 from appsettings.src.manual import ImportFolderScanner
+from appsettings.src.media_stats import MediaStatsRefresh
 from appsettings.src.reindex import Reindex, ReindexManual, ReindexPopulate
 from celery import Task, shared_task
 from celery.exceptions import Retry
 from channel.src.index import YoutubeChannel
+from common.src.env_settings import EnvironmentSettings
+from common.src.known_ids import KnownIds
 from common.src.ta_redis import RedisArchivist
 from common.src.urlparser import Parser
 from download.src.queue import PendingList
@@ -31,9 +37,15 @@ class BaseTask(Task):
 
     # pylint: disable=abstract-method
 
+    PROGRESS_RATE: float = EnvironmentSettings.TASK_PROGRESS_RATE
+    PROGRESS_INTERVAL: float = 1 / PROGRESS_RATE if PROGRESS_RATE else 0
+    _progress: dict[str, dict] = {}
+    _progress_lock = Lock()
+
     def on_failure(self, exc, task_id, args, kwargs, einfo):
         """callback for task failure"""
         print(f"{task_id} Failed callback")
+        self._stop_progress(task_id)
         message, key = self._build_message(level="error")
         message.update({"messages": [f"Task failed: {exc}"]})
         RedisArchivist().set_message(key, message, expire=20)
@@ -41,6 +53,7 @@ class BaseTask(Task):
     def on_success(self, retval, task_id, args, kwargs):
         """callback task completed successfully"""
         print(f"{task_id} success callback")
+        self._stop_progress(task_id)
         message, key = self._build_message()
         message.update({"messages": ["Task completed successfully"]})
         RedisArchivist().set_message(key, message, expire=5)
@@ -59,18 +72,78 @@ class BaseTask(Task):
         Notifications(self.name).send(task_id, task_title)
 
     def send_progress(self, message_lines, progress=False, title=False):
-        """send progress message"""
-        message, key = self._build_message()
-        message.update(
-            {
-                "messages": message_lines,
-                "progress": progress,
-            }
-        )
-        if title:
-            message["title"] = title
-
-        RedisArchivist().set_message(key, message)
+        """send progress message, coalesced to max TASK_PROGRESS_RATE"""
+        state = self._get_progress_state()
+        with state["lock"]:
+            state["pending"] = (message_lines, progress, title)
+            wait = state["sent"] + self.PROGRESS_INTERVAL - monotonic()
+            if wait > 0:
+                if not state["timer"]:
+                    # flush trailing update if no other update follows
+                    timer = Timer(wait, self._flush_progress, args=[state])
+                    timer.daemon = True
+                    state["timer"] = timer
+                    timer.start()
+                return
+
+        self._flush_progress(state)
+
+    def _get_progress_state(self) -> dict:
+        """get publisher state of current task, static message cached"""
+        task_id = self.request.id
+        with self._progress_lock:
+            state = self._progress.get(task_id)
+            if state is None:
+                message, key = self._build_message()
+                state = {
+                    "task_id": task_id,
+                    "key": key,
+                    "message": message,
+                    "lock": Lock(),
+                    "pending": None,
+                    "sent": 0.0,
+                    "timer": None,
+                }
+                self._progress[task_id] = state
+
+        return state
+
+    def _flush_progress(self, state: dict) -> None:
+        """publish latest pending progress of task"""
+        with state["lock"]:
+            state["timer"] = None
+            if not state["pending"]:
+                return
+
+            message_lines, progress, title = state["pending"]
+            state["pending"] = None
+            state["sent"] = monotonic()
+            message = state["message"].copy()
+            message.update({"messages": message_lines, "progress": progress})
+            if title:
+                message["title"] = title
+
+            # command only changes once to STOP or KILL, then stays
+            if not message.get("command"):
+                task_result = TaskManager().get_task(state["task_id"])
+                command = task_result.get("command", False)
+                state["message"]["command"] = command
+                message["command"] = command
+
+            RedisArchivist().set_message(state["key"], message)
+
+    def _stop_progress(self, task_id: str) -> None:
+        """drop publisher state, final message replaces pending progress"""
+        with self._progress_lock:
+            state = self._progress.pop(task_id, None)
+
+        if not state:
+            return
+
+        with state["lock"]:
+            state["pending"] = None
+            if state["timer"]:
+                state["timer"].cancel()
 
     def _build_message(self, level="info"):
         """build message dict"""
@@ -89,9 +162,22 @@ class BaseTask(Task):
         """check if task is stopped"""
         return TaskManager().is_stopped(self.request.id)
 
+    def bind_thread(self, func):
+        """wrap func to run in worker thread, request is thread local"""
+        task_id = self.request.id
+
+        def wrapper(*args, **kwargs):
+            self.push_request(id=task_id)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.pop_request()
+
+        return wrapper
+
 
 @shared_task(name="update_subscribed", bind=True, base=BaseTask)
-def update_subscribed(self):
+def update_subscribed(self, scan_all=False):
     """look for missing videos and add to pending"""
     manager = TaskManager()
     if manager.is_pending(self):
@@ -100,7 +186,7 @@ def update_subscribed(self):
         return None
 
     manager.init(self)
-    handler = SubscriptionScanner(task=self)
+    handler = SubscriptionScanner(task=self, scan_all=scan_all)
     missing_videos = handler.scan()
     auto_start = handler.auto_start
     if missing_videos:
@@ -161,6 +247,9 @@ def extrac_dl(self, youtube_ids, auto_start=False, status="pending"):
         status=status, auto_start=auto_start
     )
 
+    if pending_handler.fast_added:
+        pending_metadata.delay()
+
     if auto_start:
         download_pending.delay(auto_only=True)
 
@@ -170,6 +259,22 @@ def extrac_dl(self, youtube_ids, auto_start=False, status="pending"):
     return None
 
 
+@shared_task(name="pending_metadata", bind=True, base=BaseTask)
+def pending_metadata(self):
+    """add full metadata to fast added videos in download queue"""
+    manager = TaskManager()
+    if manager.is_pending(self):
+        print(f"[task][{self.name}] metadata extraction already running")
+        return None
+
+    manager.init(self)
+    added = PendingList(task=self).add_pending_metadata()
+    if added:
+        return f"added metadata for {added} videos"
+
+    return None
+
+
 @shared_task(bind=True, name="check_reindex", base=BaseTask)
 def check_reindex(self, data=False, extract_videos=False):
     """run the reindex main command"""
@@ -241,6 +346,8 @@ def run_restore_backup(self, filename):
     self.send_progress(["Reset your Index"])
     ElasitIndexWrap().reset()
     ElasticBackup(task=self).restore(filename)
+    AppConfigCache.invalidate()
+    KnownIds().rebuild()
     print("index restore finished")
 
     return f"backup restore completed: {filename}"
@@ -290,6 +397,21 @@ def re_sync_thumbs(self):
     ThumbFilesystem(task=self).embed()
 
 
+@shared_task(bind=True, name="refresh_media_stats", base=BaseTask)
+def refresh_media_stats(self):
+    """probe media files changed since last probe"""
+    manager = TaskManager()
+    if manager.is_pending(self):
+        print(f"[task][{self.name}] media stats refresh already running")
+        self.send_progress("Media stats refresh is already running.")
+        return None
+
+    manager.init(self)
+    updated = MediaStatsRefresh(task=self).run()
+
+    return f"refreshed media stats of {updated} videos"
+
+
 @shared_task(bind=True, name="subscribe_to", base=BaseTask)
 def subscribe_to(self, url_str: str, expected_type: str | bool = False):
     """
@@ -306,6 +428,21 @@ def index_channel_playlists(self, channel_id):
     channel.index_channel_playlists()
 
 
+@shared_task(bind=True, name="rebuild_known_ids", base=BaseTask)
+def rebuild_known_ids(self):
+    """rebuild redis set of known youtube_ids from index"""
+    manager = TaskManager()
+    if manager.is_pending(self):
+        print(f"[task][{self.name}] known ids rebuild is already running")
+        self.send_progress("Known ids rebuild is already running.")
+        return None
+
+    manager.init(self)
+    total = KnownIds().rebuild()
+
+    return f"rebuild known ids completed with {total} ids"
+
+
 @shared_task(name="version_check")
 def version_check():
     """check for new updates"""
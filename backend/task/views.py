@@ -50,8 +50,8 @@ class TaskNameListView(ApiBaseView):
         handle post request
         404 for invalid task_name
         400 if task can't be started here without argument
+        scan_all: rescan all subscriptions, not only due channels
         """
-        # pylint: disable=unused-argument
         task_config = TASK_CONFIG.get(task_name)
         if not task_config:
             message = {"message": "invalid task name"}
@@ -61,7 +61,11 @@ class TaskNameListView(ApiBaseView):
             message = {"message": "can not start task through this endpoint"}
             return Response(message, status=400)
 
-        message = TaskCommand().start(task_name)
+        kwargs = {}
+        if task_name == "update_subscribed" and request.data.get("scan_all"):
+            kwargs["scan_all"] = True
+
+        message = TaskCommand().start(task_name, **kwargs)
 
         return Response({"message": message})
 
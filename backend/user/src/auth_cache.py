@@ -0,0 +1,102 @@
+"""
+Functionality:
+- short lived in process cache of auth decisions
+- used by the nginx auth_request endpoint to skip session and token lookups
+- revoked across processes with a short lived marker in redis
+"""
+
+from threading import Lock
+from time import monotonic
+
+from common.src.ta_redis import RedisBase
+from django.conf import settings
+from django.utils.crypto import salted_hmac
+
+
+class AuthCache:
+    """remember successful auth checks per session or token"""
+
+    TTL: int = 30
+    MAX_ENTRIES: int = 1024
+    SALT: str = "ta-auth-check"
+
+    _cache: dict[str, float] = {}
+    _lock = Lock()
+
+    @classmethod
+    def build_key(cls, request) -> str | None:
+        """build signed cache key from session cookie or token header"""
+        session_id = request.COOKIES.get(settings.SESSION_COOKIE_NAME, "")
+        token = request.META.get("HTTP_AUTHORIZATION", "")
+        if not session_id and not token:
+            return None
+
+        value = f"{session_id}:{token}"
+        return salted_hmac(cls.SALT, value).hexdigest()
+
+    @classmethod
+    def is_valid(cls, key: str) -> bool:
+        """check if key is cached, not expired and not revoked"""
+        with cls._lock:
+            expires = cls._cache.get(key)
+            if expires is None:
+                return False
+
+            if expires < monotonic():
+                cls._cache.pop(key, None)
+                return False
+
+        if cls._is_revoked(key):
+            with cls._lock:
+                cls._cache.pop(key, None)
+
+            return False
+
+        return True
+
+    @classmethod
+    def set_valid(cls, key: str) -> None:
+        """remember successful auth for TTL seconds"""
+        now = monotonic()
+        with cls._lock:
+            if len(cls._cache) >= cls.MAX_ENTRIES:
+                cls._purge(now)
+
+            cls._cache[key] = now + cls.TTL
+
+    @classmethod
+    def revoke(cls, key: str | None) -> None:
+        """remove key in all processes, e.g. on logout"""
+        if not key:
+            return
+
+        with cls._lock:
+            cls._cache.pop(key, None)
+
+        # cached entries of other processes expire within TTL
+        RedisBase().conn.execute_command(
+            "SET", cls._revoked_key(key), 1, "EX", cls.TTL
+        )
+
+    @classmethod
+    def _is_revoked(cls, key: str) -> bool:
+        """check revoke marker set by any process"""
+        exists = RedisBase().conn.execute_command(
+            "EXISTS", cls._revoked_key(key)
+        )
+        return bool(exists)
+
+    @staticmethod
+    def _revoked_key(key: str) -> str:
+        """build redis key of revoke marker"""
+        return f"{RedisBase.NAME_SPACE}auth:revoked:{key}"
+
+    @classmethod
+    def _purge(cls, now: float) -> None:
+        """drop expired entries, clear all if still full"""
+        expired = [i for i, expires in cls._cache.items() if expires < now]
+        for key in expired:
+            cls._cache.pop(key)
+
+        if len(cls._cache) >= cls.MAX_ENTRIES:
+            cls._cache.clear()
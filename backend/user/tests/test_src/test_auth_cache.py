@@ -0,0 +1,84 @@
+"""test auth check cache"""
+
+# flake8: noqa: E402
+
+import os
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+import pytest
+from django.test import RequestFactory
+from user.src import auth_cache
+from user.src.auth_cache import AuthCache
+
+
+class FakeRedis:
+    """stand in for redis connection, shared by all instances"""
+
+    NAME_SPACE: str = "ta:"
+    keys: set[str] = set()
+
+    def __init__(self):
+        self.conn = self
+
+    def execute_command(self, command, key, *_):
+        """handle SET and EXISTS"""
+        if command == "SET":
+            self.keys.add(key)
+            return True
+
+        return int(key in self.keys)
+
+
+@pytest.fixture(name="fake_redis")
+def fixture_fake_redis(monkeypatch):
+    """revoke markers without redis server"""
+    monkeypatch.setattr(FakeRedis, "keys", set())
+    monkeypatch.setattr(auth_cache, "RedisBase", FakeRedis)
+
+
+def test_no_credentials():
+    """no key without session or token"""
+    request = RequestFactory().get("/api/auth-check/")
+    assert AuthCache.build_key(request) is None
+
+
+def test_key_is_signed():
+    """raw session id is not used as key"""
+    request = RequestFactory().get("/api/auth-check/")
+    request.COOKIES["sessionid"] = "abc123"
+    key = AuthCache.build_key(request)
+    assert key
+    assert "abc123" not in key
+
+
+@pytest.mark.usefixtures("fake_redis")
+def test_set_and_revoke():
+    """cache decision until revoked"""
+    request = RequestFactory().get(
+        "/api/auth-check/", HTTP_AUTHORIZATION="Token 123"
+    )
+    key = AuthCache.build_key(request)
+    assert not AuthCache.is_valid(key)
+    AuthCache.set_valid(key)
+    assert AuthCache.is_valid(key)
+    AuthCache.revoke(key)
+    assert not AuthCache.is_valid(key)
+
+
+@pytest.mark.usefixtures("fake_redis")
+def test_revoke_other_process():
+    """revoke marker invalidates entry cached in other process"""
+    AuthCache.set_valid("other")
+    FakeRedis().execute_command("SET", AuthCache._revoked_key("other"))
+    assert not AuthCache.is_valid("other")
+
+
+def test_expired(monkeypatch):
+    """expired entries are invalid"""
+    monkeypatch.setattr(AuthCache, "TTL", -1)
+    AuthCache.set_valid("expired")
+    assert not AuthCache.is_valid("expired")
@@ -9,6 +9,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from user.models import Account
 from user.serializers import AccountSerializer
+from user.src.auth_cache import AuthCache
 from user.src.user_config import UserConfig
 
 
@@ -91,5 +92,6 @@ class LogoutApiView(ApiBaseView):
 
     def post(self, request, *args, **kwargs):
         """logout on post request"""
+        AuthCache.revoke(AuthCache.build_key(request))
         logout(request)
         return Response({"message": "Successfully logged out."}, status=200)
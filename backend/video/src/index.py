@@ -11,8 +11,9 @@ import requests
 from channel.src import index as ta_channel
 from common.src.env_settings import EnvironmentSettings
 from common.src.es_connect import ElasticWrap
-from common.src.helper import get_duration_sec, get_duration_str, randomizor
+from common.src.helper import randomizor
 from common.src.index_generic import YouTubeItem
+from common.src.known_ids import KnownIds
 from django.conf import settings
 from playlist.src import index as ta_playlist
 from ryd_client import ryd_client
@@ -130,9 +131,15 @@ class YoutubeVideo(YouTubeItem, YoutubeSubtitle):
         self.channel_id = False
         self.video_type = video_type
         self.offline_import = False
-
-    def build_json(self, youtube_meta_overwrite=False, media_path=False):
-        """build json dict of video"""
+        self.channel_cache: ta_channel.ChannelRunCache | None = None
+
+    def build_json(
+        self, youtube_meta_overwrite=False, media_path=False, cached=None
+    ):
+        """
+        build json dict of video
+        pass cached document to skip probing an unchanged media file
+        """
         self.get_from_youtube()
         if not self.youtube_meta and not youtube_meta_overwrite:
             return
@@ -145,8 +152,7 @@ class YoutubeVideo(YouTubeItem, YoutubeSubtitle):
         self._add_channel()
         self._add_stats()
         self.add_file_path()
-        self.add_player(media_path)
-        self.add_streams(media_path)
+        self.add_media_stats(media_path, cached)
         if self.config["downloads"]["integrate_ryd"]:
             self._get_ryd_stats()
 
@@ -211,9 +217,21 @@ class YoutubeVideo(YouTubeItem, YoutubeSubtitle):
 
     def _add_channel(self):
         """add channel dict to video json_data"""
-        channel = ta_channel.YoutubeChannel(self.channel_id)
-        channel.build_json(upload=True, fallback=self.youtube_meta)
-        self.json_data.update({"channel": channel.json_data})
+        if self.channel_cache:
+            json_data = self.channel_cache.get(
+                self.channel_id, fallback=self.youtube_meta
+            )
+        else:
+            channel = ta_channel.YoutubeChannel(self.channel_id)
+            channel.build_json(upload=True, fallback=self.youtube_meta)
+            json_data = channel.json_data
+
+        channel_data = {
+            key: value
+            for key, value in json_data.items()
+            if key not in ta_channel.YoutubeChannel.CHANNEL_ONLY
+        }
+        self.json_data.update({"channel": channel_data})
 
     def _add_stats(self):
         """add stats dicst to json_data"""
@@ -243,31 +261,14 @@ class YoutubeVideo(YouTubeItem, YoutubeSubtitle):
 
         raise FileNotFoundError
 
-    def add_player(self, media_path=False):
-        """add player information for new videos"""
-        vid_path = media_path or self.build_dl_cache_path()
-        duration = get_duration_sec(vid_path)
-
-        self.json_data.update(
-            {
-                "player": {
-                    "watched": False,
-                    "duration": duration,
-                    "duration_str": get_duration_str(duration),
-                }
-            }
-        )
-
-    def add_streams(self, media_path=False):
-        """add stream metadata"""
+    def add_media_stats(self, media_path=False, cached=None):
+        """add player, stream metadata and size from media file"""
         vid_path = media_path or self.build_dl_cache_path()
         media = MediaStreamExtractor(vid_path)
-        self.json_data.update(
-            {
-                "streams": media.extract_metadata(),
-                "media_size": media.get_file_size(),
-            }
-        )
+        media_url = self.json_data["media_url"]
+        media_stats = media.get_media_stats(media_url, cached)
+        media_stats["player"]["watched"] = False
+        self.json_data.update(media_stats)
 
     def add_file_path(self):
         """build media_url for where file will be located"""
@@ -293,6 +294,7 @@ class YoutubeVideo(YouTubeItem, YoutubeSubtitle):
 
         self.del_in_playlists()
         self.del_in_es()
+        KnownIds().discard(self.youtube_id)
         self.delete_subtitles()
         self.delete_comments()
 
@@ -392,13 +394,22 @@ class YoutubeVideo(YouTubeItem, YoutubeSubtitle):
         _, _ = ElasticWrap(path).post(data=data)
 
 
-def index_new_video(youtube_id, video_type=VideoTypeEnum.VIDEOS):
-    """combined classes to create new video in index"""
+def index_new_video(
+    youtube_id, video_type=VideoTypeEnum.VIDEOS, channel_cache=None
+):
+    """
+    combined classes to create new video in index
+    pass channel_cache to build each channel once per run
+    """
     video = YoutubeVideo(youtube_id, video_type=video_type)
+    # reuse extraction from adding to queue
+    video.use_cache = True
+    video.channel_cache = channel_cache
     video.build_json()
     if not video.json_data:
         raise ValueError("failed to get metadata for " + youtube_id)
 
     video.check_subtitles()
     video.upload_to_es()
+    KnownIds().add(youtube_id)
     return video.json_data
@@ -4,16 +4,50 @@ import json
 import subprocess
 from os import stat
 
+from common.src.helper import get_duration_str
+
 
 class MediaStreamExtractor:
-    """extract stream metadata"""
+    """extract stream metadata and duration in a single ffprobe pass"""
 
     def __init__(self, media_path):
         self.media_path = media_path
         self.metadata = []
+        self.duration = 0
+
+    def get_media_stats(self, media_url, cached=None):
+        """
+        build player, streams and media_size fields of video document
+        reuse fields of cached document if the file is unchanged
+        """
+        probe_key = self.get_probe_key(media_url)
+        if cached and cached.get("media_probe_key") == probe_key:
+            duration = cached["player"]["duration"]
+            streams = cached["streams"]
+            media_size = cached["media_size"]
+        else:
+            streams = self.extract_metadata()
+            duration = self.duration
+            media_size = self.get_file_size()
+
+        media_stats = {
+            "player": {
+                "duration": duration,
+                "duration_str": get_duration_str(duration),
+            },
+            "streams": streams,
+            "media_size": media_size,
+            "media_probe_key": probe_key,
+        }
+        return media_stats
+
+    def get_probe_key(self, media_url):
+        """identify file state, probe is valid while key matches"""
+        file_stat = stat(self.media_path)
+        return f"{media_url}:{file_stat.st_size}:{file_stat.st_mtime_ns}"
 
     def extract_metadata(self):
-        """entry point to extract metadata"""
+        """entry point to extract metadata, raise if file can't be probed"""
 
         cmd = [
             "ffprobe",
@@ -26,18 +60,25 @@ class MediaStreamExtractor:
             self.media_path,
         ]
         result = subprocess.run(
-            cmd, capture_output=True, text=True, check=False
+            cmd, capture_output=True, text=True, check=True
         )
 
-        if result.returncode != 0:
-            return self.metadata
-
-        streams = json.loads(result.stdout).get("streams")
-        for stream in streams:
+        probe = json.loads(result.stdout)
+        self.duration = self._get_duration(probe.get("format", {}))
+        for stream in probe.get("streams", []):
             self.process_stream(stream)
 
         return self.metadata
 
+    @staticmethod
+    def _get_duration(media_format):
+        """parse duration in seconds, 0 if not available"""
+        duration_raw = media_format.get("duration")
+        if not duration_raw or duration_raw == "N/A":
+            return 0
+
+        return int(float(duration_raw))
+
     def process_stream(self, stream):
         """parse stream to metadata"""
         codec_type = stream.get("codec_type")
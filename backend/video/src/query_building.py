@@ -1,6 +1,6 @@
 """build query for video fetching"""
 
-from common.src.ta_redis import RedisArchivist
+from common.src.ta_redis import UserProgress
 from video.src.constants import OrderEnum, SortEnum, VideoTypeEnum
 
 
@@ -59,14 +59,11 @@ class QueryBuilder:
         return {"match": {"player.watched": watch == "watched"}}
 
     def _build_continue_must(self):
-        results = RedisArchivist().list_items(f"{self.user_id}:progress:")
-        if not results:
+        youtube_ids = UserProgress(self.user_id).get_in_progress()
+        if not youtube_ids:
             return None
 
-        ids = [{"match": {"youtube_id": i.get("youtube_id")}} for i in results]
-        continue_ids = {"bool": {"should": ids}}
-
-        return continue_ids
+        return {"terms": {"youtube_id": youtube_ids}}
 
     def parse_type(self, video_type: str):
         """parse video type"""
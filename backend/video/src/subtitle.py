@@ -11,7 +11,7 @@ from datetime import datetime
 
 import requests
 from common.src.env_settings import EnvironmentSettings
-from common.src.es_connect import ElasticWrap
+from common.src.es_connect import BulkWriter, ElasticWrap
 from common.src.helper import requests_headers
 
 
@@ -116,6 +116,7 @@ class YoutubeSubtitle:
         """download subtitle files to archive"""
         videos_base = EnvironmentSettings.MEDIA_DIR
         indexed = []
+        bulk = BulkWriter()
         for subtitle in relevant_subtitles:
             dest_path = os.path.join(videos_base, subtitle["media_url"])
             source = subtitle["source"]
@@ -140,11 +141,12 @@ class YoutubeSubtitle:
             subtitle_str = parser.get_subtitle_str()
             self._write_subtitle_file(dest_path, subtitle_str)
             if self.video.config["downloads"]["subtitle_index"]:
-                query_str = parser.create_bulk_import(self.video, source)
-                self._index_subtitle(query_str)
+                parser.create_bulk_import(self.video, source, bulk)
 
             indexed.append(subtitle)
 
+        bulk.flush()
+
         return indexed
 
     def _write_subtitle_file(self, dest_path, subtitle_str):
@@ -159,11 +161,6 @@ class YoutubeSubtitle:
         if host_uid and host_gid:
             os.chown(dest_path, host_uid, host_gid)
 
-    @staticmethod
-    def _index_subtitle(query_str):
-        """send subtitle to es for indexing"""
-        _, _ = ElasticWrap("_bulk").post(data=query_str, ndjson=True)
-
     def delete(self, subtitles=False):
         """delete subtitles from index and filesystem"""
         youtube_id = self.video.youtube_id
@@ -274,21 +271,12 @@ class SubtitleParser:
 
         return subtitle_str
 
-    def create_bulk_import(self, video, source):
-        """subtitle lines for es import"""
+    def create_bulk_import(self, video, source, bulk):
+        """add subtitle documents to BulkWriter for es import"""
         documents = self._create_documents(video, source)
-        bulk_list = []
-
         for document in documents:
             document_id = document.get("subtitle_fragment_id")
-            action = {"index": {"_index": "ta_subtitle", "_id": document_id}}
-            bulk_list.append(json.dumps(action))
-            bulk_list.append(json.dumps(document))
-
-        bulk_list.append("\n")
-        query_str = "\n".join(bulk_list)
-
-        return query_str
+            bulk.index("ta_subtitle", document_id, document)
 
     def _create_documents(self, video, source):
         """process documents"""
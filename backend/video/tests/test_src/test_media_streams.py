@@ -0,0 +1,55 @@
+"""tests for media stream extraction"""
+
+import json
+import os
+import subprocess
+
+from video.src.media_streams import MediaStreamExtractor
+
+PROBE = {
+    "format": {"duration": "61.5"},
+    "streams": [
+        {
+            "index": 0,
+            "codec_type": "video",
+            "codec_name": "vp9",
+            "width": 1920,
+            "height": 1080,
+            "bit_rate": "1000",
+        },
+        {"index": 1, "codec_type": "audio", "codec_name": "opus"},
+    ],
+}
+
+
+def test_single_probe(tmp_path, monkeypatch):
+    """one ffprobe call for duration and streams, skipped if unchanged"""
+    media_path = tmp_path / "2xZ4u8ZoDqs.mp4"
+    media_path.write_bytes(b"media")
+    calls = []
+
+    def fake_run(cmd, **_):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout=json.dumps(PROBE))
+
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    media_url = "UCxyz/2xZ4u8ZoDqs.mp4"
+    media_stats = MediaStreamExtractor(str(media_path)).get_media_stats(
+        media_url
+    )
+    assert len(calls) == 1
+    assert media_stats["player"]["duration"] == 61
+    assert [i["type"] for i in media_stats["streams"]] == ["video", "audio"]
+    assert media_stats["media_size"] == 5
+
+    cached = MediaStreamExtractor(str(media_path)).get_media_stats(
+        media_url, cached=media_stats
+    )
+    assert len(calls) == 1
+    assert cached == media_stats
+
+    os.utime(media_path, ns=(0, 0))
+    MediaStreamExtractor(str(media_path)).get_media_stats(
+        media_url, cached=media_stats
+    )
+    assert len(calls) == 2
@@ -1,6 +1,6 @@
 """all API views for video endpoints"""
 
-from common.src.ta_redis import RedisArchivist
+from common.src.ta_redis import UserProgress
 from common.views_base import AdminWriteOnly, ApiBaseView
 from playlist.src.index import YoutubePlaylist
 from rest_framework.response import Response
@@ -105,16 +105,16 @@ class VideoProgressView(ApiBaseView):
     def post(self, request, video_id):
         """set progress position in redis"""
         position = request.data.get("position", 0)
-        key = f"{request.user.id}:progress:{video_id}"
-        message = {"position": position, "youtube_id": video_id}
-        RedisArchivist().set_message(key, message)
+        duration = request.data.get("duration")
+        UserProgress(request.user.id).set_position(
+            video_id, position, duration=duration
+        )
         self.response = request.data
         return Response(self.response)
 
     def delete(self, request, video_id):
         """delete progress position"""
-        key = f"{request.user.id}:progress:{video_id}"
-        RedisArchivist().del_message(key)
+        UserProgress(request.user.id).delete(video_id)
         self.response = {"progress-reset": video_id}
 
         return Response(self.response)
@@ -5,11 +5,17 @@ type TaskNamesType =
   | 'update_subscribed'
   | 'manual_import'
   | 'resync_thumbs'
-  | 'rescan_filesystem';
+  | 'rescan_filesystem'
+  | 'refresh_media_stats';
 
-const updateTaskByName = async (taskName: TaskNamesType) => {
+type TaskArgsType = {
+  scan_all?: boolean;
+};
+
+const updateTaskByName = async (taskName: TaskNamesType, args?: TaskArgsType) => {
   return APIClient(`/api/task/by-name/${taskName}/`, {
     method: 'POST',
+    body: args,
   });
 };
 
@@ -3,12 +3,17 @@ import APIClient from '../../functions/APIClient';
 type VideoProgressProp = {
   youtubeId: string;
   currentProgress: number;
+  duration?: number;
 };
 
-const updateVideoProgressById = async ({ youtubeId, currentProgress }: VideoProgressProp) => {
+const updateVideoProgressById = async ({
+  youtubeId,
+  currentProgress,
+  duration,
+}: VideoProgressProp) => {
   return APIClient(`/api/video/${youtubeId}/progress/`, {
     method: 'POST',
-    body: { position: currentProgress },
+    body: { position: currentProgress, duration },
   });
 };
 
@@ -6,10 +6,15 @@ export type AppSettingsConfigType = {
     live_channel_size: number | null;
     shorts_channel_size: number | null;
     auto_start: boolean;
+    scan_workers: number | null;
   };
   downloads: {
     limit_speed: number | null;
     sleep_interval: number | null;
+    parallel_downloads: number | null;
+    parallel_per_channel: number | null;
+    fast_add: boolean;
+    extract_workers: number | null;
     autodelete_days: number | null;
     format: string | null;
     format_sort: string | null;
@@ -8,6 +8,7 @@ import updateDownloadQueueStatusById from '../api/actions/updateDownloadQueueSta
 import { useState } from 'react';
 import getApiUrl from '../configuration/getApiUrl';
 import { useUserConfigStore } from '../stores/UserConfigStore';
+import defaultVideoThumb from '/img/default-video-thumb.jpg';
 
 type DownloadListItemProps = {
   download: Download;
@@ -25,7 +26,14 @@ const DownloadListItem = ({ download, setRefresh }: DownloadListItemProps) => {
     <div className={`video-item ${view}`} id={`dl-${download.youtube_id}`}>
       <div className={`video-thumb-wrap ${view}`}>
         <div className="video-thumb">
-          <img src={`${getApiUrl()}${download.vid_thumb_url}`} alt="video_thumb" />
+          <img
+            src={`${getApiUrl()}${download.vid_thumb_url}`}
+            alt="video_thumb"
+            onError={({ currentTarget }) => {
+              currentTarget.onerror = null; // prevents looping
+              currentTarget.src = defaultVideoThumb;
+            }}
+          />
 
           <div className="video-tags">
             {showIgnored && <span>ignored</span>}
@@ -52,10 +60,14 @@ const DownloadListItem = ({ download, setRefresh }: DownloadListItemProps) => {
           </a>
         </div>
 
-        <p>
-          Published: {formatDate(download.published)} | Duration: {download.duration} |{' '}
-          {download.youtube_id}
-        </p>
+        {download.published && (
+          <p>
+            Published: {formatDate(download.published)} | Duration: {download.duration} |{' '}
+            {download.youtube_id}
+          </p>
+        )}
+
+        {!download.published && <p>Metadata pending | {download.youtube_id}</p>}
 
         {download.message && <p className="danger-zone">{download.message}</p>}
 
@@ -45,6 +45,7 @@ async function castVideoProgress(
       await updateVideoProgressById({
         youtubeId: videoId,
         currentProgress: currentTime,
+        duration,
       });
 
       if (!video.player.watched) {
@@ -84,6 +85,7 @@ async function castVideoPaused(
         await updateVideoProgressById({
           youtubeId: videoId,
           currentProgress: currentTime,
+          duration,
         });
       }
     }
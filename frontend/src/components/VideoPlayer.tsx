@@ -84,6 +84,7 @@ const handleTimeUpdate =
       await updateVideoProgressById({
         youtubeId,
         currentProgress: currentTime,
+        duration,
       });
 
       if (!watched) {
@@ -190,6 +191,7 @@ const VideoPlayer = ({
               await updateVideoProgressById({
                 youtubeId: videoId,
                 currentProgress: currentTime,
+                duration,
               });
             }}
             onEnded={handleVideoEnd(videoId, watched)}
@@ -22,12 +22,12 @@ import { useUserConfigStore } from '../stores/UserConfigStore';
 
 type Download = {
   auto_start: boolean;
-  channel_id: string;
+  channel_id?: string;
   channel_indexed: boolean;
   channel_name: string;
-  duration: string;
+  duration?: string;
   message?: string;
-  published: string;
+  published?: string;
   status: string;
   timestamp: number;
   title: string;
@@ -137,7 +137,7 @@ const Download = () => {
               className={rescanPending ? 'rotate-img' : ''}
               onClick={async () => {
                 setRescanPending(!rescanPending);
-                await updateTaskByName('update_subscribed');
+                await updateTaskByName('update_subscribed', { scan_all: true });
               }}
               src={iconRescan}
               alt="rescan-icon"
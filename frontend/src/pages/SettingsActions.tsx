@@ -26,6 +26,7 @@ const SettingsActions = () => {
   const [backupStarted, setBackupStarted] = useState(false);
   const [isRestoringBackup, setIsRestoringBackup] = useState(false);
   const [reScanningFileSystem, setReScanningFileSystem] = useState(false);
+  const [refreshingMediaStats, setRefreshingMediaStats] = useState(false);
 
   const [backupListResponse, setBackupListResponse] = useState<BackupListType>();
 
@@ -54,7 +55,8 @@ const SettingsActions = () => {
             reEmbed ||
             backupStarted ||
             isRestoringBackup ||
-            reScanningFileSystem
+            reScanningFileSystem ||
+            refreshingMediaStats
           }
           setShouldRefresh={() => {
             setDeleteIgnored(false);
@@ -64,6 +66,7 @@ const SettingsActions = () => {
             setBackupStarted(false);
             setIsRestoringBackup(false);
             setReScanningFileSystem(false);
+            setRefreshingMediaStats(false);
           }}
         />
 
@@ -234,6 +237,25 @@ const SettingsActions = () => {
             )}
           </div>
         </div>
+        <div className="settings-group">
+          <h2>Refresh media stats</h2>
+          <p>
+            Read duration, streams and file size again from media files changed since they were
+            last indexed.
+          </p>
+          <div id="media-stats-refresh">
+            {refreshingMediaStats && <p>Media stats refresh in progress</p>}
+            {!refreshingMediaStats && (
+              <Button
+                label="Refresh media stats"
+                onClick={async () => {
+                  await updateTaskByName('refresh_media_stats');
+                  setRefreshingMediaStats(true);
+                }}
+              />
+            )}
+          </div>
+        </div>
       </div>
     </>
   );
@@ -59,11 +59,16 @@ const SettingsApplication = () => {
   const [livePageSize, setLivePageSize] = useState<number | null>(null);
   const [shortPageSize, setShortPageSize] = useState<number | null>(null);
   const [isAutostart, setIsAutostart] = useState<boolean>(false);
+  const [scanWorkers, setScanWorkers] = useState<number | null>(null);
 
   // Downloads
   const [currentDownloadSpeed, setCurrentDownloadSpeed] = useState<number | null>(null);
   const [currentThrottledRate, setCurrentThrottledRate] = useState<number | null>(null);
   const [currentScrapingSleep, setCurrentScrapingSleep] = useState<number | null>(null);
+  const [parallelDownloads, setParallelDownloads] = useState<number | null>(null);
+  const [parallelPerChannel, setParallelPerChannel] = useState<number | null>(null);
+  const [isFastAdd, setIsFastAdd] = useState<boolean>(false);
+  const [extractWorkers, setExtractWorkers] = useState<number | null>(null);
   const [currentAutodelete, setCurrentAutodelete] = useState<number | null>(null);
 
   // Download Format
@@ -109,11 +114,16 @@ const SettingsApplication = () => {
     setLivePageSize(appSettingsConfig.subscriptions.live_channel_size);
     setShortPageSize(appSettingsConfig.subscriptions.shorts_channel_size);
     setIsAutostart(appSettingsConfig.subscriptions.auto_start);
+    setScanWorkers(appSettingsConfig.subscriptions.scan_workers);
 
     // Downloads
     setCurrentDownloadSpeed(appSettingsConfig.downloads.limit_speed);
     setCurrentThrottledRate(appSettingsConfig.downloads.throttledratelimit);
     setCurrentScrapingSleep(appSettingsConfig.downloads.sleep_interval);
+    setParallelDownloads(appSettingsConfig.downloads.parallel_downloads);
+    setParallelPerChannel(appSettingsConfig.downloads.parallel_per_channel);
+    setIsFastAdd(appSettingsConfig.downloads.fast_add);
+    setExtractWorkers(appSettingsConfig.downloads.extract_workers);
     setCurrentAutodelete(appSettingsConfig.downloads.autodelete_days);
 
     // Download Format
@@ -220,6 +230,12 @@ const SettingsApplication = () => {
                       Autostart automatically starts downloading videos from subscriptions with
                       priority.
                     </li>
+                    <li>
+                      Scan workers sets how many channels are scanned at the same time, default 1.
+                      <ul>
+                        <li>All workers share the rate limit set by the sleep interval.</li>
+                      </ul>
+                    </li>
                   </ul>
                 </div>
               )}
@@ -262,6 +278,19 @@ const SettingsApplication = () => {
                   updateCallback={handleUpdateConfig}
                 />
               </div>
+              <div className="settings-box-wrapper">
+                <div>
+                  <p>Scan workers</p>
+                </div>
+                <InputConfig
+                  type="number"
+                  name="subscriptions.scan_workers"
+                  value={scanWorkers}
+                  setValue={setScanWorkers}
+                  oldValue={appSettingsConfig?.subscriptions.scan_workers}
+                  updateCallback={handleUpdateConfig}
+                />
+              </div>
               <div className="settings-box-wrapper">
                 <div>
                   <p>Autostart download subscriptions</p>
@@ -295,6 +324,23 @@ const SettingsApplication = () => {
                         <li>Minimal recommended is 10.</li>
                       </ul>
                     </li>
+                    <li>
+                      Parallel downloads sets how many videos download at the same time, default 1.
+                      <ul>
+                        <li>Optionally limit parallel downloads from the same channel.</li>
+                      </ul>
+                    </li>
+                    <li>
+                      Fast add queues videos of channels and playlists without extracting each
+                      video first.
+                      <ul>
+                        <li>Metadata gets added in the background or before download.</li>
+                      </ul>
+                    </li>
+                    <li>
+                      Extract workers sets how many videos get extracted at the same time when adding
+                      to the queue, default 1.
+                    </li>
                     <li>
                       Auto delete deletes videos marked as watched after x days.
                       <ul>
@@ -344,6 +390,55 @@ const SettingsApplication = () => {
                   updateCallback={handleUpdateConfig}
                 />
               </div>
+              <div className="settings-box-wrapper">
+                <div>
+                  <p>Parallel downloads</p>
+                </div>
+                <InputConfig
+                  type="number"
+                  name="downloads.parallel_downloads"
+                  value={parallelDownloads}
+                  setValue={setParallelDownloads}
+                  oldValue={appSettingsConfig?.downloads.parallel_downloads}
+                  updateCallback={handleUpdateConfig}
+                />
+              </div>
+              <div className="settings-box-wrapper">
+                <div>
+                  <p>Parallel downloads per channel</p>
+                </div>
+                <InputConfig
+                  type="number"
+                  name="downloads.parallel_per_channel"
+                  value={parallelPerChannel}
+                  setValue={setParallelPerChannel}
+                  oldValue={appSettingsConfig?.downloads.parallel_per_channel}
+                  updateCallback={handleUpdateConfig}
+                />
+              </div>
+              <div className="settings-box-wrapper">
+                <div>
+                  <p>Fast add channels and playlists</p>
+                </div>
+                <ToggleConfig
+                  name="downloads.fast_add"
+                  value={isFastAdd}
+                  updateCallback={handleUpdateConfig}
+                />
+              </div>
+              <div className="settings-box-wrapper">
+                <div>
+                  <p>Extract workers</p>
+                </div>
+                <InputConfig
+                  type="number"
+                  name="downloads.extract_workers"
+                  value={extractWorkers}
+                  setValue={setExtractWorkers}
+                  oldValue={appSettingsConfig?.downloads.extract_workers}
+                  updateCallback={handleUpdateConfig}
+                />
+              </div>
               <div className="settings-box-wrapper">
                 <div>
                   <p>
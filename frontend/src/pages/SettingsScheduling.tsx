@@ -21,6 +21,7 @@ const SettingsScheduling = () => {
   const [appriseNotification, setAppriseNotification] = useState<AppriseNotificationType>();
 
   const [updateSubscribed, setUpdateSubscribed] = useState<string | undefined>();
+  const [updateSubscribedDays, setUpdateSubscribedDays] = useState<number | undefined>();
   const [downloadPending, setDownloadPending] = useState<string | undefined>();
   const [checkReindex, setCheckReindex] = useState<string | undefined>();
   const [checkReindexDays, setCheckReindexDays] = useState<number | undefined>();
@@ -150,6 +151,40 @@ const SettingsScheduling = () => {
 
                 setUpdateSubscribed('');
 
+                setRefresh(true);
+              }}
+            />
+          </div>
+          <div className="settings-item">
+            <p>
+              Current max days between channel scans:{' '}
+              <span className="settings-current">
+                {updateSubscribedSchedule?.config?.days || 'False'}
+              </span>
+            </p>
+            <p>
+              Only scan channels when a new upload is expected based on their upload frequency, but
+              at least every x days. Set 0 to scan all channels on every run:
+            </p>
+
+            <input
+              type="number"
+              value={updateSubscribedDays || updateSubscribedSchedule?.config?.days || 0}
+              onChange={e => {
+                setUpdateSubscribedDays(Number(e.currentTarget.value));
+              }}
+            />
+            <Button
+              label="Save"
+              onClick={async () => {
+                await createTaskSchedule('update_subscribed', {
+                  config: {
+                    days: updateSubscribedDays,
+                  },
+                });
+
+                setUpdateSubscribedDays(undefined);
+
                 setRefresh(true);
               }}
             />